@@ -2,22 +2,22 @@
 
 from typing import Dict, Any
 
-from fastapi import APIRouter, Depends, Request, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import ORJSONResponse
 
 from app.logging import get_logger
 from app.security.deps import get_current_user
 
 logger = get_logger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 @router.post("/auth/validate")
 async def validate_token(
     request: Request,
     current_user: Dict[str, Any] = Depends(get_current_user)
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Validate JWT token and return claims.
     
@@ -28,11 +28,8 @@ async def validate_token(
     Returns:
         JSON response with claims or error
     """
-    correlation_id = getattr(request.state, 'correlation_id', 'unknown')
-    
     logger.info(
         "Token validation requested",
-        correlation_id=correlation_id,
         sub=current_user.get('sub'),
         client_id=current_user.get('client_id'),
         iss=current_user.get('iss'),
@@ -40,7 +37,7 @@ async def validate_token(
     )
     
     # Return success response with claims
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200,
         content={
             "code": "200",
@@ -1,25 +1,78 @@
 """Onboarding routes with scope-based authorization."""
 
-from typing import Dict, Any, List
+from typing import Dict, Any, AsyncIterator
 
-from fastapi import APIRouter, Depends, Request, HTTPException, status
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from app.logging import get_logger
-from app.security.deps import get_current_user, require_scope, get_client_id, get_user_id
+from app.security.deps import require_scope, get_client_id, get_user_id
 
 logger = get_logger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Shared scope dependencies so FastAPI caches one resolution per request
+require_read = require_scope("TSIAM-Read")
+require_write = require_scope("TSIAM-Write")
+
+# Static parts of the simulated application records; handlers only add the
+# per-request fields on top of these
+SAMPLE_APPS = (
+    {
+        "id": "app-001",
+        "name": "Sample Application 1",
+        "status": "active",
+        "created_at": "2024-01-15T10:30:00Z",
+    },
+    {
+        "id": "app-002",
+        "name": "Sample Application 2",
+        "status": "pending",
+        "created_at": "2024-01-16T14:20:00Z",
+    },
+)
+
+APP_DETAIL_TEMPLATE = {
+    "status": "active",
+    "created_at": "2024-01-15T10:30:00Z",
+    "description": "Sample application description",
+    "environment": "production",
+}
+
+# Fields a client may not overwrite on update
+PROTECTED_UPDATE_FIELDS = frozenset({'id', 'created_at', 'owner', 'client_id'})
+
+
+async def _iter_applications(user_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the applications owned by a user (simulated data source)."""
+    for app in SAMPLE_APPS:
+        yield {**app, "owner": user_id}
+
+
+async def _stream_applications(apps: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Stream the applications list response as incremental JSON.
+    
+    Only one application is serialized and buffered at a time; the total is
+    emitted after the array once all items have been counted.
+    """
+    yield b'{"code":"200","status":"success","data":{"applications":['
+    total = 0
+    async for app in apps:
+        yield (b"," if total else b"") + orjson.dumps(app)
+        total += 1
+    yield b'],"total":' + str(total).encode() + b'}}'
 
 
 @router.get("/onboarding/apps")
 async def get_onboarding_apps(
     request: Request,
-    current_user: Dict[str, Any] = Depends(require_scope("TSIAM-Read")),
+    current_user: Dict[str, Any] = Depends(require_read),
     client_id: str = Depends(get_client_id),
     user_id: str = Depends(get_user_id)
-) -> JSONResponse:
+) -> StreamingResponse:
     """
     Get onboarding applications.
     
@@ -32,46 +85,18 @@ async def get_onboarding_apps(
         user_id: User ID from JWT claims
         
     Returns:
-        JSON response with applications list
+        Streamed JSON response with applications list
     """
-    correlation_id = getattr(request.state, 'correlation_id', 'unknown')
-    
     logger.info(
         "Get onboarding apps requested",
-        correlation_id=correlation_id,
         client_id=client_id,
         user_id=user_id,
         sub=current_user.get('sub')
     )
     
-    # Simulate application data
-    apps = [
-        {
-            "id": "app-001",
-            "name": "Sample Application 1",
-            "status": "active",
-            "created_at": "2024-01-15T10:30:00Z",
-            "owner": user_id
-        },
-        {
-            "id": "app-002", 
-            "name": "Sample Application 2",
-            "status": "pending",
-            "created_at": "2024-01-16T14:20:00Z",
-            "owner": user_id
-        }
-    ]
-    
-    return JSONResponse(
-        status_code=200,
-        content={
-            "code": "200",
-            "status": "success",
-            "data": {
-                "applications": apps,
-                "total": len(apps)
-            }
-        }
+    return StreamingResponse(
+        _stream_applications(_iter_applications(user_id)),
+        media_type="application/json"
     )
 
 
@@ -79,10 +104,10 @@ async def get_onboarding_apps(
 async def create_onboarding_app(
     request: Request,
     app_data: dict,
-    current_user: Dict[str, Any] = Depends(require_scope("TSIAM-Write")),
+    current_user: Dict[str, Any] = Depends(require_write),
     client_id: str = Depends(get_client_id),
     user_id: str = Depends(get_user_id)
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Create a new onboarding application.
     
@@ -98,11 +123,8 @@ async def create_onboarding_app(
     Returns:
         JSON response with created application
     """
-    correlation_id = getattr(request.state, 'correlation_id', 'unknown')
-    
     logger.info(
         "Create onboarding app requested",
-        correlation_id=correlation_id,
         client_id=client_id,
         user_id=user_id,
         sub=current_user.get('sub'),
@@ -126,13 +148,12 @@ async def create_onboarding_app(
     
     logger.info(
         "Application created successfully",
-        correlation_id=correlation_id,
         app_id=new_app['id'],
         app_name=new_app['name'],
         user_id=user_id
     )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=201,
         content={
             "code": "201",
@@ -148,10 +169,10 @@ async def create_onboarding_app(
 async def get_onboarding_app(
     app_id: str,
     request: Request,
-    current_user: Dict[str, Any] = Depends(require_scope("TSIAM-Read")),
+    current_user: Dict[str, Any] = Depends(require_read),
     client_id: str = Depends(get_client_id),
     user_id: str = Depends(get_user_id)
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Get a specific onboarding application by ID.
     
@@ -167,11 +188,8 @@ async def get_onboarding_app(
     Returns:
         JSON response with application details
     """
-    correlation_id = getattr(request.state, 'correlation_id', 'unknown')
-    
     logger.info(
         "Get onboarding app requested",
-        correlation_id=correlation_id,
         app_id=app_id,
         client_id=client_id,
         user_id=user_id,
@@ -182,15 +200,12 @@ async def get_onboarding_app(
     app = {
         "id": app_id,
         "name": f"Application {app_id}",
-        "status": "active",
-        "created_at": "2024-01-15T10:30:00Z",
+        **APP_DETAIL_TEMPLATE,
         "owner": user_id,
         "client_id": client_id,
-        "description": "Sample application description",
-        "environment": "production"
     }
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200,
         content={
             "code": "200",
@@ -207,10 +222,10 @@ async def update_onboarding_app(
     app_id: str,
     app_data: dict,
     request: Request,
-    current_user: Dict[str, Any] = Depends(require_scope("TSIAM-Write")),
+    current_user: Dict[str, Any] = Depends(require_write),
     client_id: str = Depends(get_client_id),
     user_id: str = Depends(get_user_id)
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Update an onboarding application.
     
@@ -227,11 +242,8 @@ async def update_onboarding_app(
     Returns:
         JSON response with updated application
     """
-    correlation_id = getattr(request.state, 'correlation_id', 'unknown')
-    
     logger.info(
         "Update onboarding app requested",
-        correlation_id=correlation_id,
         app_id=app_id,
         client_id=client_id,
         user_id=user_id,
@@ -251,17 +263,16 @@ async def update_onboarding_app(
     
     # Add any additional fields from request
     for key, value in app_data.items():
-        if key not in ['id', 'created_at', 'owner', 'client_id']:
+        if key not in PROTECTED_UPDATE_FIELDS:
             updated_app[key] = value
     
     logger.info(
         "Application updated successfully",
-        correlation_id=correlation_id,
         app_id=app_id,
         user_id=user_id
     )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200,
         content={
             "code": "200",
@@ -1,8 +1,10 @@
 """Configuration management for COP Guard API protection layer."""
 
-import os
-from typing import List, Optional
-from pydantic import BaseSettings, validator
+from functools import lru_cache
+from typing import Annotated, List, Optional
+
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -11,44 +13,63 @@ class Settings(BaseSettings):
     # Server configuration
     port: int = 8080
     host: str = "0.0.0.0"
+    workers: int = 1  # Rate limits and caches are per process; scale limits accordingly
     
     # JWT/Auth configuration
     cop_audience: str = "TSIAM"
-    allowed_issuers: List[str] = []
+    allowed_issuers: Annotated[List[str], NoDecode] = []
     jwks_url_primary: Optional[str] = None
     jwks_url_secondary: Optional[str] = None
     jwks_cache_ttl_sec: int = 900
     jwks_background_refresh_sec: int = 600
     max_clock_skew_sec: int = 120
+    jwks_cache_dir: Optional[str] = None  # Directory for last-known-good JWKS snapshots; unset disables
     
     # TLS configuration
     tls_enabled: bool = True
+    tls_protected_prefix: str = "/api/"  # Path prefix that must be served over HTTPS
+    
+    # CORS
+    cors_allowed_origins: Annotated[List[str], NoDecode] = []  # Explicit allowlist; empty blocks cross-origin calls
+    cors_max_age_sec: int = 86400  # How long browsers may cache a preflight response
     
     # Rate limiting
     rate_limit_default_per_min: int = 100
     
     # Logging
     log_level: str = "INFO"
+    log_sample_rate: float = 0.1  # Fraction of probe/health requests that get an access log
+    auth_log_sample_rate: float = 0.1  # Fraction of successful authentications that get logged
     
     # Metrics
     enable_metrics: bool = False
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        extra="ignore",
+    )
         
-    @validator('allowed_issuers', pre=True)
-    def parse_allowed_issuers(cls, v):
+    @field_validator('allowed_issuers', 'cors_allowed_origins', mode='before')
+    @classmethod
+    def parse_comma_separated(cls, v):
         if isinstance(v, str):
-            return [issuer.strip() for issuer in v.split(',') if issuer.strip()]
+            return [item.strip() for item in v.split(',') if item.strip()]
         return v
     
-    @validator('jwks_url_primary', 'jwks_url_secondary')
+    @field_validator('jwks_url_primary', 'jwks_url_secondary')
+    @classmethod
     def validate_jwks_urls(cls, v):
         if v and not v.startswith('https://'):
             raise ValueError('JWKS URLs must use HTTPS')
         return v
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsed from the environment once."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -1,44 +1,67 @@
 """Main FastAPI application with all middleware and routes."""
 
 import asyncio
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
+import orjson
 from fastapi import FastAPI, Request, Response
+from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.config import settings
 from app.logging import setup_logging, get_logger
-from app.middleware.correlation import CorrelationIDMiddleware
+from app.middleware.edge import EdgeMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.tls import TLSEnforcementMiddleware
 from app.security.jwks_cache import jwks_cache
 from app.api import routes_public, routes_auth, routes_onboarding
+from app.api.routes_public import HEALTH_BODY
+
+# Static response bodies, serialized once at import
+ROOT_BODY = orjson.dumps({
+    "service": "COP Guard API Protection Layer",
+    "version": "1.0.0",
+    "status": "running"
+})
 
 # Setup logging
 setup_logging(settings.log_level)
 logger = get_logger(__name__)
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan manager."""
-    # Startup
-    logger.info("Starting COP Guard API protection layer")
-    
-    # Initialize JWKS cache
+async def warm_jwks_cache() -> None:
+    """Load and fetch the JWKS in the background so startup doesn't wait on it."""
     try:
         await jwks_cache.initialize()
         logger.info("JWKS cache initialized successfully")
     except Exception as e:
         logger.error("Failed to initialize JWKS cache", error=str(e))
         # Don't fail startup - service can still run with limited functionality
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan manager."""
+    # Startup
+    logger.info("Starting COP Guard API protection layer")
+    
+    # Accept traffic right away; requests that need a key before the warm-up
+    # fetch lands join that same in-flight fetch in JWKSCache
+    warmup = asyncio.create_task(warm_jwks_cache())
     
     yield
     
     # Shutdown
     logger.info("Shutting down COP Guard API protection layer")
     
+    if not warmup.done():
+        warmup.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup
+    
     # Stop JWKS background refresh
     try:
         await jwks_cache.stop_background_refresh()
@@ -53,32 +76,21 @@ app = FastAPI(
     description="Production-ready API protection layer for COP APIs called by IDP",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if settings.log_level == "DEBUG" else None,
     redoc_url="/redoc" if settings.log_level == "DEBUG" else None,
 )
 
-# Add security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    """Add security headers to all responses."""
-    response = await call_next(request)
-    
-    # Security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    
-    return response
-
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
+    allow_origins=settings.cors_allowed_origins,
+    # Browsers reject credentials with a wildcard origin, so only allow them
+    # for an explicit allowlist
+    allow_credentials="*" not in settings.cors_allowed_origins,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    max_age=settings.cors_max_age_sec,
 )
 
 # Add trusted host middleware
@@ -87,17 +99,26 @@ app.add_middleware(
     allowed_hosts=["*"]  # Configure appropriately for production
 )
 
-# Add correlation ID middleware
-app.add_middleware(CorrelationIDMiddleware)
+# Add TLS enforcement middleware (inside the edge middleware, so 426
+# responses still carry the correlation ID and security headers)
+app.add_middleware(TLSEnforcementMiddleware)
 
-# Add rate limiting middleware
+# Add rate limiting middleware (inside the edge middleware, so 429
+# responses still carry the correlation ID and security headers)
 app.add_middleware(RateLimitMiddleware)
 
+# Add edge middleware (correlation ID, security headers, access log)
+app.add_middleware(EdgeMiddleware)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for unhandled errors."""
-    correlation_id = getattr(request.state, 'correlation_id', 'unknown')
+    try:
+        correlation_id = request.state.correlation_id
+    except AttributeError:
+        # Raised before EdgeMiddleware tagged the request
+        correlation_id = 'unknown'
     
     logger.error(
         "Unhandled exception",
@@ -107,7 +128,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         url=str(request.url)
     )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "code": "500",
@@ -116,42 +137,79 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
+
+# HTTP error handler; same {"detail": ...} body as Starlette's, encoded by orjson
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """Render HTTPException (auth, scope and TLS errors) with ORJSONResponse."""
+    if exc.status_code in (204, 304):
+        return Response(status_code=exc.status_code, headers=exc.headers)
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=exc.headers
+    )
+
 # Include routers
 app.include_router(routes_public.router, tags=["public"])
 app.include_router(routes_auth.router, prefix="/api/v1", tags=["authentication"])
 app.include_router(routes_onboarding.router, prefix="/api/v1", tags=["onboarding"])
 
+
+def custom_openapi():
+    """
+    OpenAPI schema with the bearer scheme on the /api/ operations.
+    
+    get_current_user reads the Authorization header directly instead of
+    through HTTPBearer, so the security requirement is declared here.
+    """
+    if app.openapi_schema:
+        return app.openapi_schema
+    
+    schema = get_openapi(
+        title=app.title,
+        version=app.version,
+        description=app.description,
+        routes=app.routes,
+    )
+    schema.setdefault("components", {})["securitySchemes"] = {
+        "HTTPBearer": {"type": "http", "scheme": "bearer"}
+    }
+    # Every /api/ operation sits behind get_current_user
+    for path, operations in schema["paths"].items():
+        if path.startswith("/api/"):
+            for operation in operations.values():
+                operation["security"] = [{"HTTPBearer": []}]
+    
+    app.openapi_schema = schema
+    return schema
+
+
+app.openapi = custom_openapi
+
 # Root endpoint
 @app.get("/")
-async def root():
+async def root() -> Response:
     """Root endpoint."""
-    return {
-        "service": "COP Guard API Protection Layer",
-        "version": "1.0.0",
-        "status": "running"
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 # Health check endpoint (alternative to /healthz)
 @app.get("/health")
-async def health():
+async def health() -> Response:
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "service": "cop-guard",
-        "version": "1.0.0"
-    }
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 # Metrics endpoint (if enabled)
 if settings.enable_metrics:
     @app.get("/metrics")
-    async def metrics():
+    async def metrics() -> ORJSONResponse:
         """Prometheus metrics endpoint."""
         # Basic metrics - in production you'd use prometheus_client
-        return {
+        return ORJSONResponse({
             "service": "cop-guard",
             "version": "1.0.0",
             "status": "healthy"
-        }
+        })
 
 if __name__ == "__main__":
     import uvicorn
@@ -163,10 +221,16 @@ if __name__ == "__main__":
         log_level=settings.log_level
     )
     
+    reload = settings.log_level == "DEBUG"
+    
+    # uvicorn[standard] picks uvloop/httptools automatically; reload needs a
+    # single process. EdgeMiddleware already writes the access log.
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
+        workers=1 if reload else settings.workers,
         log_level=settings.log_level.lower(),
-        reload=settings.log_level == "DEBUG"
+        access_log=False,
+        reload=reload
     )
@@ -1,49 +0,0 @@
-"""Correlation ID middleware for request tracking."""
-
-import uuid
-from typing import Callable
-
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-
-from app.logging import get_logger, set_correlation_id, get_correlation_id
-
-logger = get_logger(__name__)
-
-
-class CorrelationIDMiddleware(BaseHTTPMiddleware):
-    """Middleware to add correlation ID to requests and responses."""
-    
-    def __init__(self, app, header_name: str = "X-Correlation-ID"):
-        super().__init__(app)
-        self.header_name = header_name
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process request and add correlation ID."""
-        # Get correlation ID from request header or generate new one
-        correlation_id = request.headers.get(self.header_name)
-        if not correlation_id:
-            correlation_id = str(uuid.uuid4())
-        
-        # Set correlation ID in context
-        set_correlation_id(correlation_id)
-        
-        # Add correlation ID to request state
-        request.state.correlation_id = correlation_id
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add correlation ID to response headers
-        response.headers[self.header_name] = correlation_id
-        
-        # Log request completion
-        logger.info(
-            "Request completed",
-            method=request.method,
-            url=str(request.url),
-            status_code=response.status_code,
-            correlation_id=correlation_id
-        )
-        
-        return response
@@ -0,0 +1,89 @@
+"""Edge middleware: correlation ID, security headers and access logging."""
+
+import random
+
+from starlette.datastructures import URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.logging import get_logger, set_correlation_id, generate_correlation_id
+
+logger = get_logger(__name__)
+
+# Probe/health endpoints whose access logs are sampled rather than always emitted
+HIGH_TRAFFIC_PATHS = frozenset({"/healthz", "/health", "/metrics", "/"})
+
+# Pre-encoded, lower-cased ASGI tuples; immutable so responses share them
+SECURITY_HEADERS = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+)
+
+
+class EdgeMiddleware:
+    """
+    Pure ASGI middleware for the per-request work done at the edge.
+    
+    Handles correlation ID propagation, security response headers and the
+    request-completion access log in a single middleware frame.
+    """
+    
+    def __init__(self, app: ASGIApp, header_name: str = "X-Correlation-ID"):
+        self.app = app
+        self.header_name = header_name
+        self._raw_header_name = header_name.lower().encode("latin-1")
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Process request, tag it with a correlation ID and decorate the response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Get correlation ID from the raw request headers (ASGI header names are
+        # already lower-cased) or generate new one
+        correlation_id = None
+        for name, value in scope["headers"]:
+            if name == self._raw_header_name:
+                correlation_id = value.decode("latin-1")
+                break
+        if not correlation_id:
+            correlation_id = generate_correlation_id()
+        
+        # Set correlation ID in context
+        set_correlation_id(correlation_id)
+        
+        # Add correlation ID to request state
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        
+        correlation_header = (self._raw_header_name, correlation_id.encode("latin-1"))
+        
+        async def send_with_edge_headers(message: Message) -> None:
+            if message["type"] != "http.response.start":
+                await send(message)
+                return
+            
+            # Copy the app's headers once, then append the shared static ones
+            headers = list(message.get("headers", ()))
+            headers.extend(SECURITY_HEADERS)
+            headers.append(correlation_header)
+            message["headers"] = headers
+            await send(message)
+            
+            # Log once the response has started (sampled for high-traffic
+            # probe endpoints), without waiting for the body to finish
+            if (
+                scope["path"] not in HIGH_TRAFFIC_PATHS
+                or random.random() < settings.log_sample_rate
+            ):
+                logger.info(
+                    "Request completed",
+                    method=scope["method"],
+                    url=str(URL(scope=scope)),
+                    status_code=message["status"]
+                )
+        
+        # Process request
+        await self.app(scope, receive, send_with_edge_headers)
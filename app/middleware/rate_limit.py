@@ -1,100 +1,228 @@
-"""Rate limiting middleware using slowapi."""
+"""Rate limiting middleware using an in-process token bucket."""
 
-from typing import Callable, Optional
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
 
-from fastapi import Request, Response, HTTPException, status
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.config import settings
 from app.logging import get_logger
 
 logger = get_logger(__name__)
 
+RATE_LIMIT_EXCEEDED_DETAIL = {
+    "code": "429",
+    "status": "rate_limit_exceeded",
+    "error_message": "Rate limit exceeded. Please try again later."
+}
+
+# Seconds per period accepted in rate limit strings such as "10/minute"
+RATE_LIMIT_PERIODS = {
+    "second": 1.0,
+    "minute": 60.0,
+    "hour": 3600.0,
+    "day": 86400.0,
+}
+
+
+def _scope_client_identifier(scope: Scope) -> str:
+    """Key a request by the peer address in its raw ASGI scope."""
+    client = scope.get("client")
+    host = client[0] if client and client[0] else "127.0.0.1"
+    return f"ip:{host}"
+
+
+def get_remote_address(request: Request) -> str:
+    """Get the remote IP address of the request."""
+    if not request.client or not request.client.host:
+        return "127.0.0.1"
+    return request.client.host
+
 
 def get_client_identifier(request: Request) -> str:
     """
     Get client identifier for rate limiting.
     
-    Priority:
-    1. client_id from JWT claims (if available)
-    2. Remote IP address
+    The limiter runs before authentication, so clients are keyed by their
+    remote IP address.
     """
-    # Try to get client_id from request state (set by auth middleware)
-    if hasattr(request.state, 'claims'):
-        client_id = request.state.claims.get('client_id')
-        if client_id:
-            return f"client:{client_id}"
+    return _scope_client_identifier(request.scope)
+
+
+def parse_rate_limit(limit: str) -> Tuple[int, float]:
+    """
+    Parse a rate limit string into a request count and period.
+    
+    Args:
+        limit: Rate limit string (e.g., "10/minute", "100/hour")
+        
+    Returns:
+        Tuple of (requests allowed, period in seconds)
+        
+    Raises:
+        ValueError: If the string is not of the form "<count>/<period>"
+    """
+    count, _, period = limit.partition("/")
+    try:
+        capacity = int(count)
+        period_sec = RATE_LIMIT_PERIODS[period.strip().lower()]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {limit!r}") from None
+    if capacity < 1:
+        raise ValueError(f"Invalid rate limit: {limit!r}")
+    return capacity, period_sec
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket rate limiter keyed by client identifier.
+    
+    State lives in process memory and is only touched from the event loop,
+    so no locking is needed. The number of tracked clients is bounded by
+    evicting the least recently seen bucket.
+    """
+    
+    def __init__(self, capacity: int, period_sec: float = 60.0, max_clients: int = 10000):
+        self.capacity = capacity
+        self.refill_per_sec = capacity / period_sec
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+    
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        """
+        Consume one token for the client if available.
+        
+        Args:
+            key: Client identifier
+            now: Monotonic timestamp (defaults to time.monotonic())
+            
+        Returns:
+            True if the request is within the limit
+        """
+        if now is None:
+            now = time.monotonic()
+        
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(self.capacity)
+        else:
+            last, tokens = bucket
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_per_sec)
+        
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        
+        self._buckets[key] = (now, tokens)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        
+        return allowed
     
-    # Fall back to IP address
-    return f"ip:{get_remote_address(request)}"
+    def reset(self) -> None:
+        """Forget all tracked clients."""
+        self._buckets.clear()
 
 
 # Initialize limiter
-limiter = Limiter(
-    key_func=get_client_identifier,
-    default_limits=[f"{settings.rate_limit_default_per_min}/minute"]
-)
+limiter = TokenBucketLimiter(capacity=settings.rate_limit_default_per_min)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware wrapper."""
+class RateLimitMiddleware:
+    """Pure ASGI rate limiting middleware."""
     
-    def __init__(self, app):
-        super().__init__(app)
-        # Set up rate limit exceeded handler
-        self.app.state.limiter = limiter
-        self.app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request with rate limiting."""
-        try:
-            # Check rate limit
-            limiter._check_request_limit(request)
-            
-            # Process request
-            response = await call_next(request)
-            
-            # Log rate limit status
-            client_id = get_client_identifier(request)
-            logger.debug(
-                "Rate limit check passed",
-                client_id=client_id,
-                method=request.method,
-                url=str(request.url)
-            )
-            
-            return response
-            
-        except RateLimitExceeded as e:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # Read the client straight from the scope; no Request is built
+        client_id = _scope_client_identifier(scope)
+        
+        if not limiter.allow(client_id):
             # Log rate limit exceeded
-            client_id = get_client_identifier(request)
             logger.warning(
                 "Rate limit exceeded",
                 client_id=client_id,
-                method=request.method,
-                url=str(request.url),
-                limit=str(e.detail)
+                method=scope["method"],
+                path=scope["path"],
+                limit=f"{limiter.capacity}/minute"
             )
             
             # Return rate limit error
-            raise HTTPException(
+            response = ORJSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
-                    "code": "429",
-                    "status": "rate_limit_exceeded",
-                    "error_message": "Rate limit exceeded. Please try again later."
-                }
+                content=RATE_LIMIT_EXCEEDED_DETAIL
+            )
+            await response(scope, receive, send)
+            return
+        
+        # Process request
+        await self.app(scope, receive, send)
+        
+        # Log rate limit status
+        if logger.is_enabled_for(logging.DEBUG):
+            logger.debug(
+                "Rate limit check passed",
+                client_id=client_id,
+                method=scope["method"],
+                path=scope["path"]
             )
 
 
-def rate_limit(limit: str):
+def rate_limit(limit: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """
     Decorator for per-route rate limiting.
     
+    Each decorated route gets its own token bucket per client, checked on
+    top of the global limit. The route must declare a ``request: Request``
+    parameter.
+    
     Args:
         limit: Rate limit string (e.g., "10/minute", "100/hour")
     """
-    return limiter.limit(limit)
+    capacity, period_sec = parse_rate_limit(limit)
+    route_limiter = TokenBucketLimiter(capacity=capacity, period_sec=period_sec)
+    
+    def decorator(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        is_coroutine = asyncio.iscoroutinefunction(endpoint)
+        
+        @wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            request = kwargs.get("request")
+            if not isinstance(request, Request):
+                raise TypeError(f"{endpoint.__name__} must declare a 'request: Request' parameter to be rate limited")
+            
+            client_id = get_client_identifier(request)
+            if not route_limiter.allow(client_id):
+                logger.warning(
+                    "Rate limit exceeded",
+                    client_id=client_id,
+                    method=request.method,
+                    path=request.url.path,
+                    limit=limit
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=RATE_LIMIT_EXCEEDED_DETAIL
+                )
+            
+            if is_coroutine:
+                return await endpoint(*args, **kwargs)
+            return await run_in_threadpool(endpoint, *args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
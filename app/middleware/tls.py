@@ -0,0 +1,48 @@
+"""TLS enforcement middleware."""
+
+from typing import Optional
+
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class TLSEnforcementMiddleware:
+    """
+    Pure ASGI middleware rejecting plain-HTTP calls to protected routes.
+    
+    Runs before routing, so insecure requests are answered with 426 without
+    building a Request or resolving any dependencies. Public probe and root
+    endpoints outside the protected prefix stay reachable over HTTP.
+    """
+    
+    def __init__(self, app: ASGIApp, protected_prefix: Optional[str] = None):
+        self.app = app
+        self.protected_prefix = protected_prefix or settings.tls_protected_prefix
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Reject the request with 426 if TLS is required but not in use."""
+        if (
+            scope["type"] != "http"
+            or not settings.tls_enabled
+            or scope.get("scheme") == "https"
+            or not scope["path"].startswith(self.protected_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        logger.warning("TLS required but connection is not secure", path=scope["path"])
+        response = ORJSONResponse(
+            status_code=status.HTTP_426_UPGRADE_REQUIRED,
+            content={
+                "code": "426",
+                "status": "tls_error",
+                "error_message": "HTTPS connection required"
+            }
+        )
+        await response(scope, receive, send)
@@ -1,11 +1,12 @@
 """Authorization system with scope enforcement."""
 
 from functools import wraps
-from typing import List, Union
+from typing import FrozenSet, List, Union
 
 from fastapi import HTTPException, status
 
 from app.logging import get_logger
+from app.security.jwt_validator import jwt_validator
 
 logger = get_logger(__name__)
 
@@ -24,6 +25,7 @@ def require_scopes(required_scopes: Union[str, List[str]]):
     """
     if isinstance(required_scopes, str):
         required_scopes = [required_scopes]
+    required_set = frozenset(required_scopes)
     
     def decorator(func):
         @wraps(func)
@@ -49,16 +51,17 @@ def require_scopes(required_scopes: Union[str, List[str]]):
                 )
             
             claims = request.state.claims
-            user_scopes = _extract_scopes(claims)
             
-            # Check if user has any of the required scopes
-            has_required_scope = any(scope in user_scopes for scope in required_scopes)
+            # Reuse scopes parsed once per request by get_current_user
+            auth = getattr(request.state, 'auth', None)
+            user_scopes = auth["scopes"] if auth else _extract_scopes(claims)
             
-            if not has_required_scope:
+            # Check if user has any of the required scopes
+            if required_set.isdisjoint(user_scopes):
                 logger.warning(
                     "Insufficient scope",
                     required_scopes=required_scopes,
-                    user_scopes=user_scopes,
+                    user_scopes=sorted(user_scopes),
                     sub=claims.get('sub'),
                     client_id=claims.get('client_id')
                 )
@@ -74,7 +77,7 @@ def require_scopes(required_scopes: Union[str, List[str]]):
             logger.info(
                 "Scope check passed",
                 required_scopes=required_scopes,
-                user_scopes=user_scopes,
+                user_scopes=sorted(user_scopes),
                 sub=claims.get('sub')
             )
             
@@ -84,16 +87,9 @@ def require_scopes(required_scopes: Union[str, List[str]]):
     return decorator
 
 
-def _extract_scopes(claims: dict) -> List[str]:
-    """Extract scopes from JWT claims."""
-    scope = claims.get('scope', [])
-    if isinstance(scope, str):
-        # Handle space-separated scopes
-        return [s.strip() for s in scope.split() if s.strip()]
-    elif isinstance(scope, list):
-        return scope
-    else:
-        return []
+def _extract_scopes(claims: dict) -> FrozenSet[str]:
+    """Extract scopes from JWT claims as a set for O(1) membership checks."""
+    return jwt_validator.extract_scope(claims)
 
 
 def check_scope_access(claims: dict, required_scopes: Union[str, List[str]]) -> bool:
@@ -110,13 +106,12 @@ def check_scope_access(claims: dict, required_scopes: Union[str, List[str]]) ->
     if isinstance(required_scopes, str):
         required_scopes = [required_scopes]
     
-    user_scopes = _extract_scopes(claims)
-    return any(scope in user_scopes for scope in required_scopes)
+    return not _extract_scopes(claims).isdisjoint(required_scopes)
 
 
 def get_user_scopes(claims: dict) -> List[str]:
     """Get user scopes from claims."""
-    return _extract_scopes(claims)
+    return sorted(_extract_scopes(claims))
 
 
 def get_client_id(claims: dict) -> str:
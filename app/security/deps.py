@@ -1,30 +1,65 @@
 """FastAPI dependencies for authentication and authorization."""
 
+import random
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
 from fastapi import Depends, HTTPException, Request, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from app.config import settings
 from app.logging import get_logger
 from app.security.jwt_validator import jwt_validator
 from app.security.mtls import tls_validator
 
 logger = get_logger(__name__)
 
-# HTTP Bearer token security scheme
-security = HTTPBearer(auto_error=False)
+# Fixed error payload, built once. HTTPException is still raised fresh each
+# time: re-raising a shared instance would keep growing its traceback.
+_MISSING_AUTH_DETAIL = {
+    "code": "401",
+    "status": "auth_error",
+    "error_message": "Authorization header required"
+}
 
 
-async def get_current_user(
-    request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
-) -> Dict[str, Any]:
+def get_bearer_token(request: Request) -> Optional[str]:
+    """Return the bearer token from the Authorization header, or None if absent."""
+    authorization = request.headers.get('authorization')
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    return token
+
+
+def _build_auth_state(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Derive the per-request identity downstream dependencies read."""
+    return {
+        "claims": claims,
+        "scopes": jwt_validator.extract_scope(claims),
+        "client_id": claims.get('client_id') or claims.get('sub', 'unknown'),
+        "user_id": claims.get('sub', 'unknown'),
+    }
+
+
+def _get_auth_state(request: Request, current_user: Dict[str, Any]) -> Dict[str, Any]:
+    """Read the identity stored by get_current_user, deriving it if that didn't run (e.g. overridden)."""
+    auth = getattr(request.state, "auth", None)
+    if auth is None:
+        auth = request.state.auth = _build_auth_state(current_user)
+    return auth
+
+
+async def get_current_user(request: Request) -> Dict[str, Any]:
     """
     FastAPI dependency to extract and validate JWT token.
     
+    The Authorization header is parsed inline rather than through an
+    HTTPBearer sub-dependency.
+    
     Args:
         request: FastAPI request object
-        credentials: HTTP Bearer credentials
         
     Returns:
         JWT claims dictionary
@@ -32,23 +67,20 @@ async def get_current_user(
     Raises:
         HTTPException: If authentication fails
     """
-    # Validate TLS connection if required
-    tls_info = await tls_validator.validate_tls_connection(request)
+    # Already authenticated earlier in this request (e.g. via get_optional_user)
+    existing = getattr(request.state, 'claims', None)
+    if existing is not None:
+        return existing
     
     # Extract JWT token
-    if not credentials:
+    token = get_bearer_token(request)
+    if not token:
         logger.warning("No authorization header provided")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={
-                "code": "401",
-                "status": "auth_error",
-                "error_message": "Authorization header required"
-            }
+            detail=_MISSING_AUTH_DETAIL
         )
     
-    token = credentials.credentials
-    
     # Validate JWT
     claims, error = await jwt_validator.validate_jwt(token)
     
@@ -63,43 +95,48 @@ async def get_current_user(
             }
         )
     
-    # Store claims in request state for use by other dependencies
+    # Store claims and derived identity in request state so downstream
+    # dependencies read them instead of re-parsing claims
     request.state.claims = claims
+    tls_info = tls_validator.get_tls_info(request)
     request.state.tls_info = tls_info
+    auth = request.state.auth = _build_auth_state(claims)
+    scopes = auth["scopes"]
     
-    # Log successful authentication
-    logger.info(
-        "User authenticated successfully",
-        sub=claims.get('sub'),
-        client_id=claims.get('client_id'),
-        iss=claims.get('iss'),
-        aud=claims.get('aud'),
-        scope=claims.get('scope', []),
-        tls_scheme=tls_validator.get_tls_scheme(tls_info)
-    )
+    # Log successful authentication (sampled; failures above are always logged)
+    if random.random() < settings.auth_log_sample_rate:
+        logger.info(
+            "User authenticated successfully",
+            sub=claims.get('sub'),
+            client_id=claims.get('client_id'),
+            iss=claims.get('iss'),
+            aud=claims.get('aud'),
+            scope=sorted(scopes),
+            tls_scheme=tls_validator.get_tls_scheme(tls_info)
+        )
     
     return claims
 
 
-async def get_optional_user(
-    request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
-) -> Optional[Dict[str, Any]]:
+async def get_optional_user(request: Request) -> Optional[Dict[str, Any]]:
     """
     FastAPI dependency to optionally extract and validate JWT token.
     
     Args:
         request: FastAPI request object
-        credentials: HTTP Bearer credentials
         
     Returns:
         JWT claims dictionary or None if no token provided
     """
-    if not credentials:
+    existing = getattr(request.state, 'claims', None)
+    if existing is not None:
+        return existing
+    
+    if get_bearer_token(request) is None:
         return None
     
     try:
-        return await get_current_user(request, credentials)
+        return await get_current_user(request)
     except HTTPException:
         # Re-raise authentication errors
         raise
@@ -108,35 +145,42 @@ async def get_optional_user(
         return None
 
 
+@lru_cache(maxsize=None)
 def require_scope(required_scope: str):
     """
     FastAPI dependency factory to require specific scope.
     
+    Memoized so every route requiring the same scope shares one dependency
+    callable, which FastAPI then resolves at most once per request.
+    
     Args:
         required_scope: Required scope string
         
     Returns:
         FastAPI dependency function
     """
+    forbidden_detail = {
+        "code": "403",
+        "status": "auth_error",
+        "error_message": f"Insufficient scope. Required: {required_scope}"
+    }
+    
     async def scope_dependency(
+        request: Request,
         current_user: Dict[str, Any] = Depends(get_current_user)
     ) -> Dict[str, Any]:
-        user_scopes = jwt_validator.extract_scope(current_user)
+        user_scopes = _get_auth_state(request, current_user)["scopes"]
         
         if required_scope not in user_scopes:
             logger.warning(
                 "Insufficient scope",
                 required_scope=required_scope,
-                user_scopes=user_scopes,
+                user_scopes=sorted(user_scopes),
                 sub=current_user.get('sub')
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail={
-                    "code": "403",
-                    "status": "auth_error",
-                    "error_message": f"Insufficient scope. Required: {required_scope}"
-                }
+                detail=forbidden_detail
             )
         
         return current_user
@@ -154,27 +198,28 @@ def require_any_scope(required_scopes: list):
     Returns:
         FastAPI dependency function
     """
+    forbidden_detail = {
+        "code": "403",
+        "status": "auth_error",
+        "error_message": f"Insufficient scope. Required: {', '.join(required_scopes)}"
+    }
+    
     async def scope_dependency(
+        request: Request,
         current_user: Dict[str, Any] = Depends(get_current_user)
     ) -> Dict[str, Any]:
-        user_scopes = jwt_validator.extract_scope(current_user)
+        user_scopes = _get_auth_state(request, current_user)["scopes"]
         
-        has_required_scope = any(scope in user_scopes for scope in required_scopes)
-        
-        if not has_required_scope:
+        if user_scopes.isdisjoint(required_scopes):
             logger.warning(
                 "Insufficient scope",
                 required_scopes=required_scopes,
-                user_scopes=user_scopes,
+                user_scopes=sorted(user_scopes),
                 sub=current_user.get('sub')
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail={
-                    "code": "403",
-                    "status": "auth_error",
-                    "error_message": f"Insufficient scope. Required: {', '.join(required_scopes)}"
-                }
+                detail=forbidden_detail
             )
         
         return current_user
@@ -182,40 +227,52 @@ def require_any_scope(required_scopes: list):
     return scope_dependency
 
 
-async def get_client_id(current_user: Dict[str, Any] = Depends(get_current_user)) -> str:
+async def get_client_id(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> str:
     """
     FastAPI dependency to extract client ID from JWT claims.
     
     Args:
+        request: FastAPI request object
         current_user: JWT claims from get_current_user dependency
         
     Returns:
         Client ID string
     """
-    return current_user.get('client_id') or current_user.get('sub', 'unknown')
+    return _get_auth_state(request, current_user)["client_id"]
 
 
-async def get_user_id(current_user: Dict[str, Any] = Depends(get_current_user)) -> str:
+async def get_user_id(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> str:
     """
     FastAPI dependency to extract user ID from JWT claims.
     
     Args:
+        request: FastAPI request object
         current_user: JWT claims from get_current_user dependency
         
     Returns:
         User ID string
     """
-    return current_user.get('sub', 'unknown')
+    return _get_auth_state(request, current_user)["user_id"]
 
 
-async def get_user_scopes(current_user: Dict[str, Any] = Depends(get_current_user)) -> list:
+async def get_user_scopes(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> list:
     """
     FastAPI dependency to extract user scopes from JWT claims.
     
     Args:
+        request: FastAPI request object
         current_user: JWT claims from get_current_user dependency
         
     Returns:
         List of user scopes
     """
-    return jwt_validator.extract_scope(current_user)
+    return sorted(_get_auth_state(request, current_user)["scopes"])
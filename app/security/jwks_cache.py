@@ -1,20 +1,48 @@
 """JWKS cache implementation with background refresh and key rotation support."""
 
 import asyncio
-import json
+import base64
+import hashlib
+import os
+import re
+import tempfile
 import time
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
-import requests
-from cryptography.hazmat.primitives import serialization
+import httpx
+import orjson
 from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+
+from fastapi.concurrency import run_in_threadpool
 
 from app.config import settings
 from app.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Refresh cached JWKS once this fraction of its TTL has elapsed, so keys are
+# renewed before they go stale rather than on a miss
+REFRESH_AHEAD_FACTOR = 0.8
+
+# Lower bound on the background refresh interval, whatever the server's max-age
+MIN_REFRESH_INTERVAL_SEC = 30
+
+# How long a kid that could not be found after a refresh is answered as
+# unknown without refetching, so a flood of bogus kids can't hammer the IdP
+UNKNOWN_KID_TTL_SEC = 10
+UNKNOWN_KID_CACHE_SIZE = 1024
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+def jwk_to_public_key(jwk: Dict) -> RSAPublicKey:
+    """Build an RSA public key object from a JWK's modulus and exponent."""
+    n = base64.urlsafe_b64decode(jwk['n'] + '==')
+    e = base64.urlsafe_b64decode(jwk['e'] + '==')
+    return rsa.RSAPublicNumbers(int.from_bytes(e, 'big'), int.from_bytes(n, 'big')).public_key()
+
 
 class JWKSCache:
     """JWKS cache with TTL, background refresh, and key rotation support."""
@@ -22,9 +50,17 @@ class JWKSCache:
     def __init__(self):
         self._cache: Dict[str, Dict] = {}
         self._cache_timestamps: Dict[str, float] = {}
+        self._cache_ttls: Dict[str, float] = {}
+        self._cache_validators: Dict[str, Dict[str, str]] = {}
+        self._kid_index: Dict[str, Dict] = {}
+        self._key_objects: Dict[str, RSAPublicKey] = {}
+        self._unknown_kids: Dict[str, float] = {}
+        self._inflight: Dict[Tuple[str, bool], asyncio.Future] = {}
         self._refresh_task: Optional[asyncio.Task] = None
-        self._lock = asyncio.Lock()
         self._jwks_urls: List[str] = []
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        self.reload_settings()
         
         # Initialize JWKS URLs
         if settings.jwks_url_primary:
@@ -32,6 +68,10 @@ class JWKSCache:
         if settings.jwks_url_secondary:
             self._jwks_urls.append(settings.jwks_url_secondary)
     
+    def reload_settings(self) -> None:
+        """Snapshot the TTL setting read on every fetch; call again if settings change at runtime."""
+        self._default_ttl = settings.jwks_cache_ttl_sec
+    
     async def start_background_refresh(self) -> None:
         """Start background refresh task."""
         if self._refresh_task is None or self._refresh_task.done():
@@ -39,7 +79,7 @@ class JWKSCache:
             logger.info("Started JWKS background refresh task")
     
     async def stop_background_refresh(self) -> None:
-        """Stop background refresh task."""
+        """Stop background refresh task and release the HTTP client."""
         if self._refresh_task and not self._refresh_task.done():
             self._refresh_task.cancel()
             try:
@@ -47,111 +87,295 @@ class JWKSCache:
             except asyncio.CancelledError:
                 pass
             logger.info("Stopped JWKS background refresh task")
+        
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=30)
+        return self._http
     
     async def _background_refresh_loop(self) -> None:
         """Background task to refresh JWKS periodically."""
         while True:
             try:
-                await asyncio.sleep(settings.jwks_background_refresh_sec)
+                await asyncio.sleep(self._next_refresh_delay())
                 await self._refresh_all_jwks()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error("Error in background JWKS refresh", error=str(e))
     
+    def _next_refresh_delay(self) -> float:
+        """Seconds until the next background refresh is due."""
+        delay = float(settings.jwks_background_refresh_sec)
+        if self._cache_ttls:
+            delay = min(delay, min(self._cache_ttls.values()) * REFRESH_AHEAD_FACTOR)
+        return max(delay, MIN_REFRESH_INTERVAL_SEC)
+    
     async def _refresh_all_jwks(self) -> None:
-        """Refresh all JWKS endpoints."""
+        """Refresh all JWKS endpoints concurrently."""
+        results = await asyncio.gather(
+            *(self._fetch_jwks(url, force_refresh=True) for url in self._jwks_urls),
+            return_exceptions=True
+        )
+        for url, result in zip(self._jwks_urls, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to refresh JWKS", url=url, error=str(result))
+    
+    async def get_key(self, kid: str) -> Optional[Dict]:
+        """Get a key by kid, with automatic refresh on cache miss."""
+        key = self._kid_index.get(kid)
+        if key is not None:
+            return key
+        
+        # Recently confirmed unknown: don't refetch for every request carrying it
+        unknown_until = self._unknown_kids.get(kid)
+        if unknown_until is not None:
+            if time.time() < unknown_until:
+                return None
+            del self._unknown_kids[kid]
+        
+        # Key not found, try to refresh JWKS
+        logger.warning("Key not found in cache, attempting refresh", kid=kid)
         for url in self._jwks_urls:
             try:
                 await self._fetch_jwks(url, force_refresh=True)
+                key = self._kid_index.get(kid)
+                if key is not None:
+                    logger.info("Key found after refresh", kid=kid, url=url)
+                    return key
             except Exception as e:
-                logger.error("Failed to refresh JWKS", url=url, error=str(e))
+                logger.error("Failed to refresh JWKS for key lookup", url=url, kid=kid, error=str(e))
+        
+        logger.error("Key not found after refresh attempt", kid=kid)
+        self._remember_unknown_kid(kid)
+        return None
     
-    async def get_key(self, kid: str) -> Optional[Dict]:
-        """Get a key by kid, with automatic refresh on cache miss."""
-        async with self._lock:
-            # Check if we have the key in cache
-            for url in self._jwks_urls:
-                cache_key = self._get_cache_key(url)
-                if cache_key in self._cache:
-                    jwks = self._cache[cache_key]
-                    if 'keys' in jwks:
-                        for key in jwks['keys']:
-                            if key.get('kid') == kid:
-                                return key
-            
-            # Key not found, try to refresh JWKS
-            logger.warning("Key not found in cache, attempting refresh", kid=kid)
-            for url in self._jwks_urls:
-                try:
-                    await self._fetch_jwks(url, force_refresh=True)
-                    # Check again after refresh
-                    cache_key = self._get_cache_key(url)
-                    if cache_key in self._cache:
-                        jwks = self._cache[cache_key]
-                        if 'keys' in jwks:
-                            for key in jwks['keys']:
-                                if key.get('kid') == kid:
-                                    logger.info("Key found after refresh", kid=kid, url=url)
-                                    return key
-                except Exception as e:
-                    logger.error("Failed to refresh JWKS for key lookup", url=url, kid=kid, error=str(e))
-            
-            logger.error("Key not found after refresh attempt", kid=kid)
-            return None
+    def _remember_unknown_kid(self, kid: str) -> None:
+        """Negatively cache a kid for UNKNOWN_KID_TTL_SEC."""
+        now = time.time()
+        if len(self._unknown_kids) >= UNKNOWN_KID_CACHE_SIZE:
+            self._unknown_kids = {k: t for k, t in self._unknown_kids.items() if t > now}
+            while len(self._unknown_kids) >= UNKNOWN_KID_CACHE_SIZE:
+                del self._unknown_kids[next(iter(self._unknown_kids))]
+        self._unknown_kids[kid] = now + UNKNOWN_KID_TTL_SEC
     
     async def _fetch_jwks(self, url: str, force_refresh: bool = False) -> None:
+        """Fetch JWKS from URL and cache it, joining any fetch already in flight."""
+        # Single-flight: concurrent callers for the same endpoint share one request.
+        # Forced refreshes never join an unforced fetch, which may return early
+        # from cache without fetching.
+        inflight_key = (self._get_cache_key(url), force_refresh)
+        inflight = self._inflight.get(inflight_key)
+        if inflight is None or inflight.done():
+            inflight = asyncio.ensure_future(self._do_fetch_jwks(url, force_refresh))
+            self._inflight[inflight_key] = inflight
+            inflight.add_done_callback(lambda done: self._clear_inflight(inflight_key, done))
+        
+        # Shield so one cancelled caller doesn't abort the fetch for the others
+        await asyncio.shield(inflight)
+    
+    def _clear_inflight(self, inflight_key: Tuple[str, bool], fetch: asyncio.Future) -> None:
+        """Forget a finished fetch, unless a newer one has already replaced it."""
+        if self._inflight.get(inflight_key) is fetch:
+            del self._inflight[inflight_key]
+    
+    async def _do_fetch_jwks(self, url: str, force_refresh: bool) -> None:
         """Fetch JWKS from URL and cache it."""
         cache_key = self._get_cache_key(url)
         current_time = time.time()
         
         # Check if we need to refresh
         if not force_refresh and cache_key in self._cache_timestamps:
-            if current_time - self._cache_timestamps[cache_key] < settings.jwks_cache_ttl_sec:
+            ttl = self._cache_ttls.get(cache_key, self._default_ttl)
+            if current_time - self._cache_timestamps[cache_key] < ttl * REFRESH_AHEAD_FACTOR:
                 return  # Cache is still valid
         
+        # Revalidate with a conditional GET when we already hold this JWKS
+        headers = self._cache_validators.get(cache_key, {}) if cache_key in self._cache else {}
+        
         try:
-            logger.info("Fetching JWKS", url=url)
-            response = requests.get(url, timeout=30)
+            logger.info("Fetching JWKS", url=url, conditional=bool(headers))
+            response = await self._get_http_client().get(url, headers=headers)
+            
+            if response.status_code == 304 and cache_key in self._cache:
+                # Unchanged: keep the cached keys and restart their TTL
+                self._cache_timestamps[cache_key] = current_time
+                self._cache_ttls[cache_key] = self._get_ttl(response)
+                logger.info("JWKS not modified", url=url)
+                return
+            
             response.raise_for_status()
             
-            jwks = response.json()
+            jwks = orjson.loads(response.content)
             
             # Validate JWKS structure
             if 'keys' not in jwks:
                 raise ValueError("Invalid JWKS: missing 'keys' field")
             
-            # Cache the JWKS
-            self._cache[cache_key] = jwks
+            # Cache the JWKS along with its HTTP caching metadata
+            self._publish_jwks(cache_key, jwks)
             self._cache_timestamps[cache_key] = current_time
+            self._cache_ttls[cache_key] = self._get_ttl(response)
+            self._cache_validators[cache_key] = self._get_validators(response)
+            
+            if settings.jwks_cache_dir:
+                await run_in_threadpool(self._save_snapshot, cache_key, response.content)
             
             # Log key information
             key_count = len(jwks['keys'])
             kids = [key.get('kid', 'unknown') for key in jwks['keys']]
             logger.info("JWKS cached successfully", url=url, key_count=key_count, kids=kids)
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error("Failed to fetch JWKS", url=url, error=str(e))
             raise
         except (ValueError, KeyError) as e:
             logger.error("Invalid JWKS response", url=url, error=str(e))
             raise
     
+    def _build_key_objects(self, jwks: Dict) -> Dict[str, RSAPublicKey]:
+        """Materialize public keys for a JWKS once per download, not per token."""
+        key_objects: Dict[str, RSAPublicKey] = {}
+        for jwk in jwks['keys']:
+            kid = jwk.get('kid')
+            if not kid or jwk.get('kty') != 'RSA':
+                continue
+            try:
+                key_objects[kid] = jwk_to_public_key(jwk)
+            except (KeyError, ValueError) as e:
+                logger.warning("Skipping malformed JWK", kid=kid, error=str(e))
+        return key_objects
+    
+    def _publish_jwks(self, cache_key: str, jwks: Dict) -> None:
+        """
+        Install a new JWKS for one endpoint.
+        
+        The cache, public keys and kid index are rebuilt as new dicts and
+        swapped in by reference, kid index last, so lock-free readers only
+        ever see a complete snapshot.
+        """
+        fresh_objects = self._build_key_objects(jwks)
+        
+        new_cache = dict(self._cache)
+        new_cache[cache_key] = jwks
+        
+        new_index: Dict[str, Dict] = {}
+        new_objects: Dict[str, RSAPublicKey] = {}
+        for source_key, source_jwks in new_cache.items():
+            # Keys from other endpoints keep their already-built objects
+            objects = fresh_objects if source_key == cache_key else self._key_objects
+            for key in source_jwks.get('keys', []):
+                kid = key.get('kid')
+                if not kid:
+                    continue
+                new_index[kid] = key
+                if kid in objects:
+                    new_objects[kid] = objects[kid]
+        
+        self._cache = new_cache
+        self._key_objects = new_objects
+        self._kid_index = new_index
+    
+    async def get_public_key(self, kid: str) -> Optional[RSAPublicKey]:
+        """Get a ready-to-use public key by kid, refreshing JWKS on a miss."""
+        public_key = self._key_objects.get(kid)
+        if public_key is not None:
+            return public_key
+        
+        if await self.get_key(kid) is None:
+            return None
+        return self._key_objects.get(kid)
+    
+    def _get_ttl(self, response: httpx.Response) -> float:
+        """Effective TTL: the server's Cache-Control max-age, capped by config."""
+        match = _MAX_AGE_RE.search(response.headers.get('cache-control', ''))
+        if match:
+            return min(int(match.group(1)), self._default_ttl)
+        return self._default_ttl
+    
+    def _get_validators(self, response: httpx.Response) -> Dict[str, str]:
+        """Build conditional request headers from the response's ETag/Last-Modified."""
+        validators = {}
+        etag = response.headers.get('etag')
+        if etag:
+            validators['If-None-Match'] = etag
+        last_modified = response.headers.get('last-modified')
+        if last_modified:
+            validators['If-Modified-Since'] = last_modified
+        return validators
+    
     def _get_cache_key(self, url: str) -> str:
         """Generate cache key from URL."""
         parsed = urlparse(url)
         return f"{parsed.netloc}{parsed.path}"
     
+    def _snapshot_path(self, cache_key: str) -> str:
+        """Path of the on-disk JWKS snapshot for an endpoint."""
+        name = hashlib.sha256(cache_key.encode()).hexdigest()[:16]
+        return os.path.join(settings.jwks_cache_dir, f"{name}.json")
+    
+    def _save_snapshot(self, cache_key: str, body: bytes) -> None:
+        """Atomically write the last-known-good JWKS for an endpoint."""
+        try:
+            os.makedirs(settings.jwks_cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=settings.jwks_cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, self._snapshot_path(cache_key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Failed to persist JWKS snapshot", cache_key=cache_key, error=str(e))
+    
+    def _read_snapshot(self, url: str, cache_key: str) -> Optional[Dict]:
+        """Read and parse one on-disk snapshot; None if missing or unreadable."""
+        try:
+            with open(self._snapshot_path(cache_key), "rb") as f:
+                jwks = orjson.loads(f.read())
+            if 'keys' not in jwks:
+                raise ValueError("Invalid JWKS: missing 'keys' field")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable JWKS snapshot", url=url, error=str(e))
+            return None
+        return jwks
+    
+    async def _load_snapshots(self) -> None:
+        """Seed the cache from on-disk snapshots so lookups work before the first fetch."""
+        for url in self._jwks_urls:
+            cache_key = self._get_cache_key(url)
+            # File reads and parsing stay off the event loop, which may already be serving
+            jwks = await run_in_threadpool(self._read_snapshot, url, cache_key)
+            if jwks is None:
+                continue
+            
+            # No timestamp is recorded, so the startup fetch still replaces it
+            self._publish_jwks(cache_key, jwks)
+            logger.info("Loaded JWKS snapshot", url=url, key_count=len(jwks['keys']))
+    
     async def initialize(self) -> None:
-        """Initialize cache by fetching all JWKS endpoints."""
+        """Initialize cache from disk snapshots, then fetch all JWKS endpoints concurrently."""
         logger.info("Initializing JWKS cache", urls=self._jwks_urls)
         
-        for url in self._jwks_urls:
-            try:
-                await self._fetch_jwks(url)
-            except Exception as e:
-                logger.error("Failed to initialize JWKS cache", url=url, error=str(e))
-                # Don't raise here - we want to start the service even if some JWKS endpoints fail
+        if settings.jwks_cache_dir:
+            await self._load_snapshots()
+        
+        results = await asyncio.gather(
+            *(self._fetch_jwks(url) for url in self._jwks_urls),
+            return_exceptions=True
+        )
+        for url, result in zip(self._jwks_urls, results):
+            # Don't raise here - we want to start the service even if some JWKS endpoints fail
+            if isinstance(result, Exception):
+                logger.error("Failed to initialize JWKS cache", url=url, error=str(result))
         
         # Start background refresh
         await self.start_background_refresh()
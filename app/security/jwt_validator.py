@@ -1,13 +1,20 @@
 """JWT validator with RS256 support and comprehensive claims validation."""
 
-import base64
-import json
+import hashlib
 import time
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
 import jwt
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+import orjson
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    # SIMD base64 from the optional 'speedups' extra
+    from pybase64 import urlsafe_b64decode
+except ImportError:
+    from base64 import urlsafe_b64decode
 
 from app.config import settings
 from app.logging import get_logger
@@ -15,6 +22,14 @@ from app.security.jwks_cache import jwks_cache
 
 logger = get_logger(__name__)
 
+TOKEN_EXPIRED_ERROR = "Token validation failed: Token has expired"
+
+# Validated-token cache bounds. Entries live until the token's own exp, but
+# never longer than the max age (further capped by the clock skew allowance),
+# so a key pulled from the JWKS stops being honoured quickly.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_MAX_AGE_SEC = 30
+
 
 class JWTValidationError(Exception):
     """Custom exception for JWT validation errors."""
@@ -26,17 +41,67 @@ class JWTValidator:
     
     def __init__(self):
         self.algorithm = "RS256"
+        self._verified: "OrderedDict[bytes, Tuple[Optional[Dict], Optional[str], float]]" = OrderedDict()
+        self.reload_settings()
+    
+    def reload_settings(self) -> None:
+        """
+        Snapshot the validation settings read on every request.
+        
+        Call again after changing settings at runtime; cached results are
+        dropped since they were validated against the old values.
+        """
+        self._audience = settings.cop_audience
+        self._issuers = list(settings.allowed_issuers)
+        self._allowed_issuers = frozenset(self._issuers)
+        self._skew = settings.max_clock_skew_sec
+        self._cache_max_age = min(TOKEN_CACHE_MAX_AGE_SEC, self._skew)
+        self.clear_cache()
+    
+    def clear_cache(self) -> None:
+        """Drop all cached validation results."""
+        self._verified.clear()
     
     async def validate_jwt(self, token: str) -> Tuple[Optional[Dict], Optional[str]]:
         """
         Validate JWT token and return claims or error.
         
+        Results for recently seen tokens are served from an in-process LRU
+        cache keyed by a digest of the token, skipping RSA verification.
+        
         Args:
             token: JWT token string
             
         Returns:
             Tuple of (claims_dict, error_message)
         """
+        token_hash = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        now = time.time()
+        
+        cached = self._verified.get(token_hash)
+        if cached is not None:
+            claims, error, expires_at = cached
+            if now < expires_at:
+                self._verified.move_to_end(token_hash)
+                return claims, error
+            del self._verified[token_hash]
+        
+        claims, error = await self._validate_uncached(token)
+        
+        # Only successes and expiries are stable; other failures (e.g. unknown kid)
+        # may resolve after a JWKS refresh and must be retried
+        if error is None or error == TOKEN_EXPIRED_ERROR:
+            expires_at = now + self._cache_max_age
+            if claims and 'exp' in claims:
+                expires_at = min(expires_at, claims['exp'] + self._skew)
+            self._verified[token_hash] = (claims, error, expires_at)
+            if len(self._verified) > TOKEN_CACHE_SIZE:
+                self._verified.popitem(last=False)
+        
+        return claims, error
+    
+    async def _validate_uncached(self, token: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Run full header, signature and claims validation for a token."""
         try:
             # Parse JWT header to get kid
             header = self._parse_jwt_header(token)
@@ -44,22 +109,21 @@ class JWTValidator:
             if not kid:
                 return None, "Token validation failed: Missing 'kid' in header"
             
-            # Get the public key
-            key_data = await jwks_cache.get_key(kid)
-            if not key_data:
+            # Get the pre-built public key
+            public_key = await jwks_cache.get_public_key(kid)
+            if public_key is None:
                 return None, f"Token validation failed: Key '{kid}' not found"
             
-            # Convert JWK to PEM format
-            public_key = self._jwk_to_pem(key_data)
-            
-            # Decode and verify JWT
+            # Decode and verify JWT off the event loop (RSA verify is CPU-bound)
             try:
-                claims = jwt.decode(
+                claims = await run_in_threadpool(
+                    jwt.decode,
                     token,
                     public_key,
                     algorithms=[self.algorithm],
-                    audience=settings.cop_audience,
-                    issuer=settings.allowed_issuers,
+                    audience=self._audience,
+                    issuer=self._issuers,
+                    leeway=self._skew,
                     options={
                         "verify_signature": True,
                         "verify_exp": True,
@@ -70,7 +134,7 @@ class JWTValidator:
                     }
                 )
             except jwt.ExpiredSignatureError:
-                return None, "Token validation failed: Token has expired"
+                return None, TOKEN_EXPIRED_ERROR
             except jwt.InvalidAudienceError:
                 return None, "Token validation failed: Invalid audience"
             except jwt.InvalidIssuerError:
@@ -107,65 +171,23 @@ class JWTValidator:
             if len(parts) != 3:
                 raise ValueError("Invalid JWT format")
             
-            # Decode header
+            # Decode header, restoring the base64 padding JWTs strip
             header_b64 = parts[0]
-            # Add padding if needed
-            header_b64 += '=' * (4 - len(header_b64) % 4)
-            header_json = base64.urlsafe_b64decode(header_b64)
-            header = json.loads(header_json)
+            header_json = urlsafe_b64decode(header_b64 + "==="[:-len(header_b64) & 3])
+            header = orjson.loads(header_json)
             
             return header
             
         except Exception as e:
             raise JWTValidationError(f"Failed to parse JWT header: {str(e)}")
     
-    def _jwk_to_pem(self, jwk: Dict) -> str:
-        """Convert JWK to PEM format."""
-        try:
-            # Extract key components
-            n = base64.urlsafe_b64decode(jwk['n'] + '==')
-            e = base64.urlsafe_b64decode(jwk['e'] + '==')
-            
-            # Convert to integers
-            n_int = int.from_bytes(n, 'big')
-            e_int = int.from_bytes(e, 'big')
-            
-            # Create RSA public key
-            public_key = rsa.RSAPublicNumbers(e_int, n_int).public_key()
-            
-            # Serialize to PEM
-            pem = public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            )
-            
-            return pem.decode('utf-8')
-            
-        except Exception as e:
-            raise JWTValidationError(f"Failed to convert JWK to PEM: {str(e)}")
-    
     def _validate_claims(self, claims: Dict) -> Optional[str]:
-        """Validate JWT claims with additional checks."""
-        current_time = time.time()
-        
-        # Check clock skew for iat
-        if 'iat' in claims:
-            iat = claims['iat']
-            if abs(current_time - iat) > settings.max_clock_skew_sec:
-                return f"Issued at time drift exceeds {settings.max_clock_skew_sec} seconds"
-        
-        # Check clock skew for exp
-        if 'exp' in claims:
-            exp = claims['exp']
-            if abs(current_time - exp) > settings.max_clock_skew_sec:
-                return f"Expiration time drift exceeds {settings.max_clock_skew_sec} seconds"
-        
-        # Check clock skew for nbf
-        if 'nbf' in claims:
-            nbf = claims['nbf']
-            if abs(current_time - nbf) > settings.max_clock_skew_sec:
-                return f"Not before time drift exceeds {settings.max_clock_skew_sec} seconds"
+        """
+        Validate JWT claims with additional checks.
         
+        Time claims (exp, nbf, iat) are checked by jwt.decode with the
+        configured clock skew as leeway.
+        """
         # Validate required claims
         required_claims = ['sub', 'aud', 'iss']
         for claim in required_claims:
@@ -173,35 +195,49 @@ class JWTValidator:
                 return f"Missing required claim: {claim}"
         
         # Validate audience
-        if claims['aud'] != settings.cop_audience:
-            return f"Invalid audience: expected '{settings.cop_audience}', got '{claims['aud']}'"
+        if claims['aud'] != self._audience:
+            return f"Invalid audience: expected '{self._audience}', got '{claims['aud']}'"
         
         # Validate issuer
-        if claims['iss'] not in settings.allowed_issuers:
+        if claims['iss'] not in self._allowed_issuers:
             return f"Invalid issuer: '{claims['iss']}' not in allowed issuers"
         
         return None
     
-    def extract_scope(self, claims: Dict) -> List[str]:
-        """Extract scope from claims."""
+    def extract_scope(self, claims: Dict) -> FrozenSet[str]:
+        """Extract scope from claims as a set for O(1) membership checks."""
         scope = claims.get('scope', [])
         if isinstance(scope, str):
             # Handle space-separated scopes
-            return [s.strip() for s in scope.split() if s.strip()]
+            return _parse_scope_string(scope)
         elif isinstance(scope, list):
-            return scope
+            try:
+                return _parse_scope_list(tuple(scope))
+            except TypeError:
+                # Unhashable entries (e.g. nested objects) are never scopes
+                return _parse_scope_list(tuple(item for item in scope if isinstance(item, str)))
         else:
-            return []
+            return frozenset()
     
     def has_scope(self, claims: Dict, required_scope: str) -> bool:
         """Check if claims contain required scope."""
-        scopes = self.extract_scope(claims)
-        return required_scope in scopes
+        return required_scope in self.extract_scope(claims)
     
     def has_any_scope(self, claims: Dict, required_scopes: List[str]) -> bool:
         """Check if claims contain any of the required scopes."""
-        scopes = self.extract_scope(claims)
-        return any(scope in scopes for scope in required_scopes)
+        return not self.extract_scope(claims).isdisjoint(required_scopes)
+
+
+@lru_cache(maxsize=256)
+def _parse_scope_string(scope: str) -> FrozenSet[str]:
+    """Split a space-separated scope claim; a handful of distinct values recur across tokens."""
+    return frozenset(scope.split())
+
+
+@lru_cache(maxsize=256)
+def _parse_scope_list(scope: Tuple[Any, ...]) -> FrozenSet[str]:
+    """Normalize a list scope claim, keeping only string entries; memoized like string scopes."""
+    return frozenset(item for item in scope if isinstance(item, str))
 
 
 # Global JWT validator instance
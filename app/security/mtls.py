@@ -1,15 +1,48 @@
 """TLS support for secure connections."""
 
-import ssl
-from typing import Optional, Dict, Any
+from typing import Optional
 
-from fastapi import Request, HTTPException, status
+from fastapi import Request
 
 from app.config import settings
 from app.logging import get_logger
 
 logger = get_logger(__name__)
 
+# ASGI TLS extension version codes
+TLS_VERSIONS = {
+    0x0301: 'TLS 1.0',
+    0x0302: 'TLS 1.1',
+    0x0303: 'TLS 1.2',
+    0x0304: 'TLS 1.3',
+}
+
+# ASGI scope key under which a request's TLSInfo is memoized
+TLS_INFO_SCOPE_KEY = 'cop_guard.tls_info'
+
+
+class TLSInfo:
+    """Connection details for a request, with fixed slots instead of a per-request dict."""
+    
+    __slots__ = ('scheme', 'hostname', 'port', 'is_secure', 'protocol')
+    
+    def __init__(
+        self,
+        scheme: str,
+        hostname: Optional[str],
+        port: Optional[int],
+        is_secure: bool,
+        protocol: str
+    ):
+        self.scheme = scheme
+        self.hostname = hostname
+        self.port = port
+        self.is_secure = is_secure
+        self.protocol = protocol
+    
+    def __repr__(self) -> str:
+        return f"TLSInfo(scheme={self.scheme!r}, protocol={self.protocol!r})"
+
 
 class TLSValidationError(Exception):
     """Custom exception for TLS validation errors."""
@@ -22,83 +55,51 @@ class TLSValidator:
     def __init__(self):
         self.enabled = settings.tls_enabled
     
-    async def validate_tls_connection(self, request: Request) -> Optional[Dict[str, Any]]:
+    def _get_tls_info(self, request: Request) -> TLSInfo:
+        """Extract TLS connection information."""
+        url = request.url
+        is_secure = url.scheme == 'https'
+        protocol = 'HTTP'
+        if is_secure:
+            # Servers implementing the ASGI TLS extension report the negotiated
+            # version; behind a terminating proxy it is unknown
+            tls_ext = request.scope.get('extensions', {}).get('tls') or {}
+            protocol = TLS_VERSIONS.get(tls_ext.get('tls_version'), 'TLS')
+        return TLSInfo(url.scheme, url.hostname, url.port, is_secure, protocol)
+    
+    def get_tls_info(self, request: Request) -> Optional[TLSInfo]:
         """
-        Validate TLS connection information.
+        Get TLS connection information for an already admitted request.
+        
+        Enforcement happens in TLSEnforcementMiddleware; this only describes
+        the connection for logging and request state.
         
         Args:
             request: FastAPI request object
             
         Returns:
-            TLS connection information dict or None if TLS not enabled
-            
-        Raises:
-            HTTPException: If TLS is required but connection is not secure
+            TLS connection information or None if TLS not enabled
         """
         if not self.enabled:
             return None
-        
-        try:
-            # Check if connection is secure (HTTPS)
-            is_secure = request.url.scheme == 'https'
-            
-            if not is_secure:
-                logger.warning("TLS required but connection is not secure")
-                raise HTTPException(
-                    status_code=status.HTTP_426_UPGRADE_REQUIRED,
-                    detail={
-                        "code": "426",
-                        "status": "tls_error",
-                        "error_message": "HTTPS connection required"
-                    }
-                )
-            
-            # Get TLS connection info
-            tls_info = self._get_tls_info(request)
-            
-            logger.info(
-                "TLS connection validated",
-                scheme=request.url.scheme,
-                host=request.url.hostname,
-                port=request.url.port
-            )
-            
-            return tls_info
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error("TLS validation error", error=str(e))
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail={
-                    "code": "500",
-                    "status": "tls_error",
-                    "error_message": f"TLS validation failed: {str(e)}"
-                }
-            )
-    
-    def _get_tls_info(self, request: Request) -> Dict[str, Any]:
-        """Extract TLS connection information."""
-        return {
-            'scheme': request.url.scheme,
-            'hostname': request.url.hostname,
-            'port': request.url.port,
-            'is_secure': request.url.scheme == 'https',
-            'protocol': 'TLS 1.3' if request.url.scheme == 'https' else 'HTTP'
-        }
+        # The connection details can't change within a request, so build
+        # them once and keep them on the ASGI scope for later callers
+        tls_info = request.scope.get(TLS_INFO_SCOPE_KEY)
+        if tls_info is None:
+            tls_info = request.scope[TLS_INFO_SCOPE_KEY] = self._get_tls_info(request)
+        return tls_info
     
-    def get_tls_scheme(self, tls_info: Optional[Dict[str, Any]]) -> Optional[str]:
+    def get_tls_scheme(self, tls_info: Optional[TLSInfo]) -> Optional[str]:
         """Get TLS scheme from connection info."""
-        if not tls_info:
+        if tls_info is None:
             return None
-        return tls_info.get('scheme')
+        return tls_info.scheme
     
-    def get_tls_protocol(self, tls_info: Optional[Dict[str, Any]]) -> Optional[str]:
+    def get_tls_protocol(self, tls_info: Optional[TLSInfo]) -> Optional[str]:
         """Get TLS protocol from connection info."""
-        if not tls_info:
+        if tls_info is None:
             return None
-        return tls_info.get('protocol')
+        return tls_info.protocol
 
 
 # Global TLS validator instance
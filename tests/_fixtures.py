@@ -0,0 +1,34 @@
+"""Shared test data for the API tests."""
+
+from types import MappingProxyType
+
+# Unsigned token with a test-key kid; validate_jwt is mocked wherever it is used
+MOCK_JWT_TOKEN = "eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCIsImtpZCI6InRlc3Qta2V5In0.eyJhdWQiOiJUU0lBTSIsInNjb3BlIjpbIlRTSUFNLVJlYWQiXSwic3ViIjoiRUJTU0giLCJqdGkiOiJ1dWlkLWhlcmUiLCJuYmYiOjE3NDY1MjM3MjAsImlhdCI6MTc0NjUyMzcyMCwiZXhwIjoxNzQ2NTI0MDIwLCJpc3MiOiJodHRwczovL2lkcC5leGFtcGxlL2lzc3VlciJ9.signature"
+
+# Built once; httpx copies request headers, so sharing it is safe
+AUTH_HEADERS = MappingProxyType({"Authorization": f"Bearer {MOCK_JWT_TOKEN}"})
+
+TEST_CLAIMS_READ = {
+    "aud": "TSIAM",
+    "scope": ["TSIAM-Read"],
+    "sub": "EBSSH",
+    "jti": "uuid-here",
+    "nbf": 1746523720,
+    "iat": 1746523720,
+    "exp": 1746524020,
+    "iss": "https://idp.example/issuer",
+    "client_id": "test-client"
+}
+
+TEST_CLAIMS_WRITE = {**TEST_CLAIMS_READ, "scope": ["TSIAM-Read", "TSIAM-Write"]}
+
+TEST_CLAIMS_EMPTY = {**TEST_CLAIMS_READ, "scope": []}
+
+# Read-only so a test can't leak changes into the others sharing it
+TEST_JWKS_KEY = MappingProxyType({
+    "kty": "RSA",
+    "kid": "test-key",
+    "use": "sig",
+    "n": "test-n",
+    "e": "AQAB"
+})
@@ -0,0 +1,61 @@
+"""Shared pytest fixtures."""
+
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.middleware.rate_limit import limiter
+from app.security.jwks_cache import jwks_cache
+from app.security.jwt_validator import jwt_validator
+
+
+@pytest.fixture(scope="session", autouse=True)
+def offline_jwks_cache():
+    """Keep the app's JWKS cache off the network: no refresh task, no real fetches."""
+    with patch.object(jwks_cache, "start_background_refresh", new=AsyncMock()), patch.object(
+        jwks_cache, "_fetch_jwks", new=AsyncMock()
+    ):
+        yield
+
+
+@pytest.fixture(scope="session")
+def client(offline_jwks_cache):
+    """HTTPS test client shared by the whole session, so app startup runs once."""
+    with TestClient(app, base_url="https://testserver") as test_client:
+        yield test_client
+
+
+@pytest_asyncio.fixture
+async def aclient():
+    """HTTPS client driving the app in-process on the test's own event loop."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="https://testserver") as async_client:
+        yield async_client
+
+
+@pytest.fixture
+def jwt_mocks():
+    """Patch JWKS key lookup and JWT validation; yields (mock_get_key, mock_validate_jwt)."""
+    with patch('app.security.jwks_cache.jwks_cache.get_key') as mock_get_key, patch(
+        'app.security.jwt_validator.jwt_validator.validate_jwt'
+    ) as mock_validate_jwt:
+        yield mock_get_key, mock_validate_jwt
+
+
+@pytest.fixture(autouse=True)
+def reset_token_cache():
+    """Isolate tests from token verification results cached by earlier tests."""
+    jwt_validator.clear_cache()
+    yield
+    jwt_validator.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    """Give every test a fresh rate limit budget."""
+    limiter.reset()
+    yield
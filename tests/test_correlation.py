@@ -0,0 +1,28 @@
+"""Tests for correlation ID propagation."""
+
+
+def test_correlation_id_echoed(client):
+    """Test a client-supplied correlation ID is returned unchanged."""
+    response = client.get("/healthz", headers={"X-Correlation-ID": "test-correlation-id"})
+    assert response.status_code == 200
+    assert response.headers["X-Correlation-ID"] == "test-correlation-id"
+
+
+def test_correlation_id_generated(client):
+    """Test a correlation ID is generated when none is supplied."""
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    
+    correlation_id = response.headers["X-Correlation-ID"]
+    assert len(correlation_id) == 32
+    int(correlation_id, 16)
+
+
+def test_correlation_id_added_to_log_events():
+    """Test the log processor picks up the correlation ID bound to the context."""
+    from app.logging import add_correlation_id, get_correlation_id, set_correlation_id
+    
+    set_correlation_id("bound-correlation-id")
+    
+    assert get_correlation_id() == "bound-correlation-id"
+    assert add_correlation_id(None, "info", {})["correlation_id"] == "bound-correlation-id"
@@ -1,14 +1,7 @@
 """Tests for health check endpoint."""
 
-import pytest
-from fastapi.testclient import TestClient
 
-from app.main import app
-
-client = TestClient(app)
-
-
-def test_health_check():
+def test_health_check(client):
     """Test health check endpoint returns 200."""
     response = client.get("/healthz")
     assert response.status_code == 200
@@ -19,7 +12,7 @@ def test_health_check():
     assert data["version"] == "1.0.0"
 
 
-def test_health_check_alternative():
+def test_health_check_alternative(client):
     """Test alternative health check endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
@@ -29,7 +22,7 @@ def test_health_check_alternative():
     assert data["service"] == "cop-guard"
 
 
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test root endpoint."""
     response = client.get("/")
     assert response.status_code == 200
@@ -38,3 +31,56 @@ def test_root_endpoint():
     assert data["service"] == "COP Guard API Protection Layer"
     assert data["version"] == "1.0.0"
     assert data["status"] == "running"
+
+
+def test_security_headers_present(client):
+    """Test security headers are added to responses."""
+    response = client.get("/healthz")
+    
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert response.headers["Referrer-Policy"] == "strict-origin-when-cross-origin"
+    assert response.headers["X-XSS-Protection"] == "1; mode=block"
+    assert response.headers["Strict-Transport-Security"] == "max-age=31536000; includeSubDomains"
+
+
+def test_cors_preflight_cacheable():
+    """Test preflights from an allowlisted origin succeed and are cacheable."""
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.testclient import TestClient
+    
+    from app.main import app
+    
+    # Same CORS options as the app, with an allowlisted origin configured
+    cors = next(m for m in app.user_middleware if m.cls is CORSMiddleware)
+    options = {**cors.kwargs, "allow_origins": ["https://allowed.example"]}
+    allowed_app = FastAPI()
+    allowed_app.add_middleware(CORSMiddleware, **options)
+    
+    response = TestClient(allowed_app).options(
+        "/api/v1/auth/validate",
+        headers={
+            "Origin": "https://allowed.example",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "authorization",
+        }
+    )
+    
+    assert response.status_code == 200
+    assert response.headers["Access-Control-Allow-Origin"] == "https://allowed.example"
+    assert response.headers["Access-Control-Max-Age"] == "86400"
+
+
+def test_cors_origin_not_in_allowlist_rejected(client):
+    """Test origins are not echoed back unless explicitly allowed."""
+    response = client.options(
+        "/api/v1/auth/validate",
+        headers={
+            "Origin": "https://portal.example.com",
+            "Access-Control-Request-Method": "POST",
+        }
+    )
+    
+    assert response.status_code == 400
+    assert "Access-Control-Allow-Origin" not in response.headers
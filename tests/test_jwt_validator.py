@@ -0,0 +1,191 @@
+"""Tests for JWT signature and claims validation with real RS256 keys."""
+
+import base64
+import time
+
+import httpx
+import jwt
+import pytest
+import pytest_asyncio
+from unittest.mock import patch, AsyncMock
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.config import settings
+from app.security.jwks_cache import JWKSCache
+from app.security.jwt_validator import JWTValidator, TOKEN_EXPIRED_ERROR
+
+ISSUER = "https://idp.example/issuer"
+
+
+def _b64(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    """RSA signing key for test tokens."""
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(scope="module")
+def jwk(private_key):
+    """Public JWK for the signing key."""
+    numbers = private_key.public_key().public_numbers()
+    return {"kty": "RSA", "kid": "test-key", "use": "sig", "n": _b64(numbers.n), "e": _b64(numbers.e)}
+
+
+@pytest.fixture
+def make_token(private_key):
+    """Factory for signed tokens with overridable claims."""
+    def _make(**overrides):
+        now = int(time.time())
+        claims = {
+            "iss": ISSUER,
+            "aud": settings.cop_audience,
+            "sub": "EBSSH",
+            "iat": now,
+            "nbf": now,
+            "exp": now + 300,
+            "scope": ["TSIAM-Read"],
+            "client_id": "test-client",
+        }
+        claims.update(overrides)
+        return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "test-key"})
+    return _make
+
+
+@pytest_asyncio.fixture
+async def validator(jwk):
+    """Validator backed by a real JWKSCache whose endpoint serves the test JWK over a mock transport."""
+    cache = JWKSCache()
+    cache._jwks_urls = ["https://idp.example/.well-known/jwks.json"]
+    cache._http = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"keys": [jwk]}))
+    )
+    with patch.object(settings, 'allowed_issuers', [ISSUER]), patch(
+        'app.security.jwt_validator.jwks_cache', cache
+    ):
+        yield JWTValidator()
+    await cache.stop_background_refresh()
+
+
+async def test_valid_token(validator, make_token):
+    """Test a correctly signed token yields its claims."""
+    claims, error = await validator.validate_jwt(make_token())
+    
+    assert error is None
+    assert claims["sub"] == "EBSSH"
+    assert claims["client_id"] == "test-client"
+
+
+async def test_expired_token(validator, make_token):
+    """Test an expired token is rejected with the expiry error."""
+    now = int(time.time())
+    claims, error = await validator.validate_jwt(make_token(iat=now - 600, nbf=now - 600, exp=now - 300))
+    
+    assert claims is None
+    assert error == TOKEN_EXPIRED_ERROR
+
+
+async def test_long_lived_token(validator, make_token):
+    """Test an exp far in the future is not mistaken for clock drift."""
+    claims, error = await validator.validate_jwt(make_token(exp=int(time.time()) + 3600))
+    
+    assert error is None
+    assert claims["sub"] == "EBSSH"
+
+
+async def test_clock_skew_leeway(validator, make_token):
+    """Test exp and nbf are honoured within the configured clock skew only."""
+    now = int(time.time())
+    
+    _, error = await validator.validate_jwt(make_token(iat=now - 600, nbf=now - 600, exp=now - 60))
+    assert error is None
+    
+    _, error = await validator.validate_jwt(make_token(nbf=now + 600))
+    assert error.startswith("Token validation failed")
+
+
+async def test_wrong_audience(validator, make_token):
+    """Test a token for another audience is rejected."""
+    claims, error = await validator.validate_jwt(make_token(aud="OTHER"))
+    
+    assert claims is None
+    assert error == "Token validation failed: Invalid audience"
+
+
+async def test_bad_signature(validator, make_token):
+    """Test a tampered token is rejected."""
+    header, payload, signature = make_token().split('.')
+    tampered = f"{header}.{payload}.{signature[:-4]}AAAA"
+    
+    claims, error = await validator.validate_jwt(tampered)
+    
+    assert claims is None
+    assert error.startswith("Token validation failed")
+
+
+def test_jwks_cache_builds_public_keys(private_key, jwk):
+    """Test cached JWKS are materialized into public key objects by kid."""
+    cache = JWKSCache()
+    cache._publish_jwks("jwks.example/keys", {"keys": [jwk]})
+    
+    public_key = cache._key_objects["test-key"]
+    assert public_key.public_numbers() == private_key.public_key().public_numbers()
+
+
+@pytest.mark.parametrize("kid", ["k", "k1", "k12", "k123"])
+def test_parse_header_any_padding(kid):
+    """Test headers decode whatever base64 padding was stripped."""
+    header = base64.urlsafe_b64encode(f'{{"alg":"RS256","kid":"{kid}"}}'.encode()).rstrip(b'=').decode()
+    
+    assert JWTValidator()._parse_jwt_header(f"{header}.payload.sig")["kid"] == kid
+
+
+def test_extract_scope_returns_set():
+    """Test list, space-separated and missing scope claims normalize to sets."""
+    validator = JWTValidator()
+    
+    assert validator.extract_scope({"scope": ["TSIAM-Read"]}) == frozenset({"TSIAM-Read"})
+    assert validator.extract_scope({"scope": " TSIAM-Read  TSIAM-Write "}) == frozenset({"TSIAM-Read", "TSIAM-Write"})
+    assert validator.extract_scope({}) == frozenset()
+    assert validator.extract_scope({"scope": ["TSIAM-Read", 7, {"nested": True}]}) == frozenset({"TSIAM-Read"})
+    assert validator.extract_scope({"scope": ["TSIAM-Read"]}) is validator.extract_scope({"scope": ["TSIAM-Read"]})
+    assert validator.has_any_scope({"scope": "TSIAM-Write"}, ["TSIAM-Read", "TSIAM-Write"])
+
+
+async def test_initialize_prebuilds_public_keys(private_key, jwk):
+    """Test startup materializes public keys so the first token needs no JWK parsing."""
+    cache = JWKSCache()
+    cache._jwks_urls = ["https://jwks.example/keys"]
+    cache._http = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"keys": [jwk]}))
+    )
+    
+    await cache.initialize()
+    with patch.object(cache, 'get_key', new=AsyncMock()) as mock_get_key:
+        public_key = await cache.get_public_key("test-key")
+    await cache.stop_background_refresh()
+    
+    assert public_key.public_numbers() == private_key.public_key().public_numbers()
+    mock_get_key.assert_not_awaited()
+
+
+async def test_reload_settings_rebinds_snapshot(validator, make_token):
+    """Test settings changed at runtime take effect after reload_settings."""
+    token = make_token()
+    assert (await validator.validate_jwt(token))[1] is None
+    
+    with patch.object(settings, 'cop_audience', "OTHER"):
+        validator.reload_settings()
+    
+    assert (await validator.validate_jwt(token))[1] == "Token validation failed: Invalid audience"
+
+
+def test_reload_settings_recomputes_cache_max_age(validator):
+    """Test the cache max age follows a clock skew changed at runtime."""
+    with patch.object(settings, 'max_clock_skew_sec', 5):
+        validator.reload_settings()
+    
+    assert validator._cache_max_age == 5
@@ -1,128 +1,102 @@
 """Tests for JWKS key rotation and retry logic."""
 
+import asyncio
+
 import pytest
-from unittest.mock import patch, AsyncMock, MagicMock
-from fastapi.testclient import TestClient
+import pytest_asyncio
+from unittest.mock import patch, AsyncMock
+
+from fastapi.concurrency import run_in_threadpool
 
-from app.main import app
 from app.security.jwks_cache import JWKSCache
+from tests._fixtures import AUTH_HEADERS, TEST_CLAIMS_READ, TEST_JWKS_KEY
+
+KEY_NOT_FOUND = (None, "Token validation failed: Key 'test-key' not found")
+
+OLD_JWKS = {"keys": [{"kty": "RSA", "kid": "old-key", "use": "sig", "n": "old-n", "e": "AQAB"}]}
+NEW_JWKS = {"keys": [{"kty": "RSA", "kid": "new-key", "use": "sig", "n": "new-n", "e": "AQAB"}]}
+
 
-client = TestClient(app)
-
-
-@pytest.fixture
-def mock_jwt_token():
-    """Mock JWT token for testing."""
-    return "eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCIsImtpZCI6InRlc3Qta2V5In0.eyJhdWQiOiJUU0lBTSIsInNjb3BlIjpbIlRTSUFNLVJlYWQiXSwic3ViIjoiRUJTU0giLCJqdGkiOiJ1dWlkLWhlcmUiLCJuYmYiOjE3NDY1MjM3MjAsImlhdCI6MTc0NjUyMzcyMCwiZXhwIjoxNzQ2NTI0MDIwLCJpc3MiOiJodHRwczovL2lkcC5leGFtcGxlL2lzc3VlciJ9.signature"
-
-
-@pytest.fixture
-def mock_jwt_claims():
-    """Mock JWT claims for testing."""
-    return {
-        "aud": "TSIAM",
-        "scope": ["TSIAM-Read"],
-        "sub": "EBSSH",
-        "jti": "uuid-here",
-        "nbf": 1746523720,
-        "iat": 1746523720,
-        "exp": 1746524020,
-        "iss": "https://idp.example/issuer",
-        "client_id": "test-client"
-    }
-
-
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_key_rotation_retry_success(mock_get_key, mock_validate_jwt, mock_jwt_claims, mock_jwt_token):
-    """Test successful key rotation retry."""
-    # Mock JWKS key lookup - first call fails, second succeeds
-    mock_get_key.side_effect = [
-        None,  # First call fails (key not found)
-        {     # Second call succeeds after refresh
-            "kty": "RSA",
-            "kid": "test-key",
-            "use": "sig",
-            "n": "test-n",
-            "e": "AQAB"
-        }
-    ]
-    
-    # Mock JWT validation - first call fails, second succeeds
-    mock_validate_jwt.side_effect = [
-        (None, "Token validation failed: Key 'test-key' not found"),  # First call fails
-        (mock_jwt_claims, None)  # Second call succeeds
-    ]
-    
-    response = client.post(
+@pytest_asyncio.fixture
+async def cache():
+    """A fresh JWKSCache whose refresh task and HTTP client are torn down after the test."""
+    jwks_cache = JWKSCache()
+    yield jwks_cache
+    await jwks_cache.stop_background_refresh()
+
+
+@pytest.mark.parametrize(
+    "get_key_result, validate_result, expected_status",
+    [
+        # Key still missing after the cache's refresh
+        pytest.param(None, KEY_NOT_FOUND, 401, id="key-rotation-retry-failure"),
+        # Key served from the secondary endpoint
+        pytest.param(TEST_JWKS_KEY, (TEST_CLAIMS_READ, None), 200, id="multiple-jwks-endpoints"),
+    ],
+)
+async def test_key_lookup_retry_flow(get_key_result, validate_result, expected_status, aclient, jwt_mocks):
+    """Test the validate route's response once key lookup has succeeded or failed."""
+    mock_get_key, mock_validate_jwt = jwt_mocks
+    mock_get_key.return_value = get_key_result
+    mock_validate_jwt.return_value = validate_result
+    
+    response = await aclient.post(
         "/api/v1/auth/validate",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
+        headers=AUTH_HEADERS
     )
     
-    assert response.status_code == 200
+    assert response.status_code == expected_status
     
     data = response.json()
-    assert data["code"] == "200"
-    assert data["status"] == "success"
-    assert data["claims"] == mock_jwt_claims
+    if expected_status == 200:
+        assert data["code"] == "200"
+        assert data["status"] == "success"
+        assert data["claims"] == TEST_CLAIMS_READ
+    else:
+        detail = data["detail"]
+        assert detail["code"] == "401"
+        assert detail["status"] == "auth_error"
+        assert "Key 'test-key' not found" in detail["error_message"]
 
 
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_key_rotation_retry_failure(mock_get_key, mock_validate_jwt, mock_jwt_token):
-    """Test key rotation retry failure."""
-    # Mock JWKS key lookup - both calls fail
-    mock_get_key.return_value = None
+@pytest.mark.parametrize(
+    "published, expected_kid",
+    [
+        # Endpoint rotated to the token's kid: the forced refresh finds it
+        pytest.param([OLD_JWKS, NEW_JWKS], "new-key", id="kid-found-after-refresh"),
+        # Endpoint still serves the old key set: the kid stays unknown
+        pytest.param([OLD_JWKS, OLD_JWKS], None, id="kid-missing-after-refresh"),
+    ],
+)
+async def test_unknown_kid_forces_refresh(cache, published, expected_kid):
+    """Test a kid miss refetches the JWKS once and retries the lookup."""
+    import httpx
     
-    # Mock JWT validation - both calls fail
-    mock_validate_jwt.return_value = (None, "Token validation failed: Key 'test-key' not found")
+    responses = iter(published)
+    fetches = 0
     
-    response = client.post(
-        "/api/v1/auth/validate",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
-    )
+    def handler(request):
+        nonlocal fetches
+        fetches += 1
+        return httpx.Response(200, json=next(responses))
     
-    assert response.status_code == 401
+    cache._jwks_urls = ["https://jwks.example/keys"]
+    cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    await cache._fetch_jwks("https://jwks.example/keys")
     
-    data = response.json()
-    assert data["code"] == "401"
-    assert data["status"] == "auth_error"
-    assert "Key 'test-key' not found" in data["error_message"]
+    key = await cache.get_key("new-key")
+    
+    assert fetches == 2
+    if expected_kid is None:
+        assert key is None
+    else:
+        assert key["kid"] == expected_kid
 
 
-@pytest.mark.asyncio
-async def test_jwks_cache_key_rotation():
+async def test_jwks_cache_key_rotation(cache):
     """Test JWKS cache key rotation functionality."""
-    cache = JWKSCache()
-    
     # Mock the _fetch_jwks method
     with patch.object(cache, '_fetch_jwks') as mock_fetch:
-        # First call returns old key
-        old_jwks = {
-            "keys": [
-                {
-                    "kty": "RSA",
-                    "kid": "old-key",
-                    "use": "sig",
-                    "n": "old-n",
-                    "e": "AQAB"
-                }
-            ]
-        }
-        
-        # Second call returns new key
-        new_jwks = {
-            "keys": [
-                {
-                    "kty": "RSA",
-                    "kid": "new-key",
-                    "use": "sig",
-                    "n": "new-n",
-                    "e": "AQAB"
-                }
-            ]
-        }
-        
         mock_fetch.side_effect = [None, None]  # Both calls succeed
         
         # Test getting old key
@@ -132,19 +106,28 @@ async def test_jwks_cache_key_rotation():
         # Test getting new key after rotation
         key = await cache.get_key("new-key")
         assert key is None  # Key not found initially
+        
+        # Endpoint serves the old key, then rotates to the new one
+        cache._publish_jwks("jwks.example/keys", OLD_JWKS)
+        assert (await cache.get_key("old-key"))["kid"] == "old-key"
+        
+        cache._publish_jwks("jwks.example/keys", NEW_JWKS)
+        assert (await cache.get_key("new-key"))["kid"] == "new-key"
+        assert await cache.get_key("old-key") is None
 
 
-@pytest.mark.asyncio
-async def test_jwks_cache_background_refresh():
+async def test_jwks_cache_background_refresh(cache):
     """Test JWKS cache background refresh."""
-    cache = JWKSCache()
+    refreshed = asyncio.Event()
     
-    with patch.object(cache, '_refresh_all_jwks') as mock_refresh:
+    with patch.object(cache, '_next_refresh_delay', return_value=0), patch.object(
+        cache, '_refresh_all_jwks', new=AsyncMock(side_effect=refreshed.set)
+    ) as mock_refresh:
         # Start background refresh
         await cache.start_background_refresh()
         
-        # Wait a bit for background task to run
-        await asyncio.sleep(0.1)
+        # Return as soon as the background task has run once
+        await asyncio.wait_for(refreshed.wait(), timeout=1.0)
         
         # Stop background refresh
         await cache.stop_background_refresh()
@@ -153,65 +136,206 @@ async def test_jwks_cache_background_refresh():
         assert mock_refresh.called
 
 
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_multiple_jwks_endpoints(mock_get_key, mock_validate_jwt, mock_jwt_claims, mock_jwt_token):
-    """Test JWT validation with multiple JWKS endpoints."""
-    # Mock JWKS key from secondary endpoint
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
-    }
+async def test_refresh_all_jwks_fetches_each_endpoint(cache):
+    """Test all JWKS endpoints are refreshed and one failure doesn't block others."""
+    import httpx
     
-    # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims, None)
+    def handler(request):
+        if request.url.host == "down.example":
+            return httpx.Response(503)
+        return httpx.Response(200, json={"keys": [{"kty": "RSA", "kid": "primary-key", "n": "n", "e": "AQAB"}]})
     
-    response = client.post(
-        "/api/v1/auth/validate",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
-    )
+    cache._jwks_urls = ["https://jwks.example/keys", "https://down.example/keys"]
+    cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
     
-    assert response.status_code == 200
+    await cache._refresh_all_jwks()
     
-    data = response.json()
-    assert data["code"] == "200"
-    assert data["status"] == "success"
-    assert data["claims"] == mock_jwt_claims
-
-
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_unknown_kid_with_retry(mock_get_key, mock_validate_jwt, mock_jwt_claims, mock_jwt_token):
-    """Test handling of unknown kid with retry logic."""
-    # Mock JWKS key lookup - first call fails, second succeeds
-    mock_get_key.side_effect = [
-        None,  # First call fails (unknown kid)
-        {     # Second call succeeds after refresh
-            "kty": "RSA",
-            "kid": "test-key",
-            "use": "sig",
-            "n": "test-n",
-            "e": "AQAB"
-        }
-    ]
-    
-    # Mock JWT validation - first call fails, second succeeds
-    mock_validate_jwt.side_effect = [
-        (None, "Token validation failed: Key 'test-key' not found"),  # First call fails
-        (mock_jwt_claims, None)  # Second call succeeds
-    ]
-    
-    response = client.post(
-        "/api/v1/auth/validate",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
+    assert cache.get_cached_keys() == {"jwks.example/keys": ["primary-key"]}
+
+
+async def test_jwks_conditional_refresh(cache):
+    """Test refreshes revalidate with ETag and keep keys on 304 Not Modified."""
+    import httpx
+    
+    seen_headers = []
+    
+    def handler(request):
+        seen_headers.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"Cache-Control": "max-age=60"})
+        return httpx.Response(
+            200,
+            headers={"ETag": '"v1"', "Cache-Control": "public, max-age=300"},
+            json={"keys": [{"kty": "RSA", "kid": "primary-key", "n": "n", "e": "AQAB"}]}
+        )
+    
+    cache._jwks_urls = ["https://jwks.example/keys"]
+    cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    await cache._fetch_jwks("https://jwks.example/keys")
+    assert cache._cache_ttls["jwks.example/keys"] == 300
+    
+    await cache._fetch_jwks("https://jwks.example/keys", force_refresh=True)
+    
+    assert seen_headers == [None, '"v1"']
+    assert cache.get_cached_keys() == {"jwks.example/keys": ["primary-key"]}
+    assert cache._cache_ttls["jwks.example/keys"] == 60
+
+
+async def test_get_key_uses_kid_index_without_refetch(cache):
+    """Test keys from every endpoint are served from the kid index once cached."""
+    import httpx
+    
+    requests_seen = []
+    
+    def handler(request):
+        requests_seen.append(request.url.host)
+        kid = "primary-key" if request.url.host == "primary.example" else "secondary-key"
+        return httpx.Response(200, json={"keys": [{"kty": "RSA", "kid": kid, "n": "n", "e": "AQAB"}]})
+    
+    cache._jwks_urls = ["https://primary.example/keys", "https://secondary.example/keys"]
+    cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    await cache._refresh_all_jwks()
+    primary = await cache.get_key("primary-key")
+    secondary = await cache.get_key("secondary-key")
+    
+    assert primary["kid"] == "primary-key"
+    assert secondary["kid"] == "secondary-key"
+    assert sorted(requests_seen) == ["primary.example", "secondary.example"]
+
+
+async def test_concurrent_misses_share_one_fetch(cache):
+    """Test concurrent lookups of an unknown kid coalesce and are negatively cached."""
+    import httpx
+    
+    fetches = 0
+    
+    async def handler(request):
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"keys": [{"kty": "RSA", "kid": "primary-key", "n": "n", "e": "AQAB"}]})
+    
+    cache._jwks_urls = ["https://jwks.example/keys"]
+    cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    
+    results = await asyncio.gather(*(cache.get_key("rotated-key") for _ in range(10)))
+    assert results == [None] * 10
+    assert fetches == 1
+    
+    # A repeat within the negative-cache window doesn't refetch
+    assert await cache.get_key("rotated-key") is None
+    assert await cache.get_key("primary-key") is not None
+    
+    assert fetches == 1
+
+
+async def test_forced_refresh_not_joined_to_plain_fetch(cache):
+    """Test a forced refresh doesn't share an unforced fetch that may return early from cache."""
+    import httpx
+    
+    published = OLD_JWKS
+    fetches = 0
+    
+    def handler(request):
+        nonlocal fetches
+        fetches += 1
+        return httpx.Response(200, json=published)
+    
+    url = "https://jwks.example/keys"
+    cache._jwks_urls = [url]
+    cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    await cache._fetch_jwks(url)
+    
+    published = NEW_JWKS
+    plain = asyncio.ensure_future(cache._fetch_jwks(url))
+    await asyncio.sleep(0)
+    await cache._fetch_jwks(url, force_refresh=True)
+    await plain
+    
+    assert fetches == 2
+    assert (await cache.get_key("new-key"))["kid"] == "new-key"
+
+
+async def test_jwks_snapshot_warm_start(tmp_path):
+    """Test a fetched JWKS is persisted and serves lookups after a restart."""
+    import httpx
+    
+    def handler(request):
+        return httpx.Response(200, json={"keys": [{"kty": "RSA", "kid": "primary-key", "n": "n", "e": "AQAB"}]})
+    
+    with patch('app.security.jwks_cache.settings.jwks_cache_dir', str(tmp_path)):
+        cache = JWKSCache()
+        cache._jwks_urls = ["https://jwks.example/keys"]
+        cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await cache._fetch_jwks("https://jwks.example/keys")
+        await cache.stop_background_refresh()
+        
+        restarted = JWKSCache()
+        restarted._jwks_urls = ["https://jwks.example/keys"]
+        with patch('app.security.jwks_cache.run_in_threadpool', wraps=run_in_threadpool) as offloaded:
+            await restarted._load_snapshots()
+    
+    # The snapshot is read off the event loop
+    offloaded.assert_awaited_once()
+    assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
+    assert (await restarted.get_key("primary-key"))["kid"] == "primary-key"
+
+
+async def test_malformed_jwks_body_rejected(cache):
+    """Test a non-JSON JWKS response is reported as invalid and not cached."""
+    import httpx
+    
+    cache._jwks_urls = ["https://jwks.example/keys"]
+    cache._http = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"<html>oops</html>"))
     )
     
-    assert response.status_code == 200
+    with pytest.raises(ValueError):
+        await cache._fetch_jwks("https://jwks.example/keys")
     
-    data = response.json()
-    assert data["code"] == "200"
-    assert data["status"] == "success"
-    assert data["claims"] == mock_jwt_claims
+    assert cache.get_cached_keys() == {}
+
+
+async def test_cached_lookup_not_blocked_by_refresh(cache):
+    """Test known kids are served while a refresh for an unknown kid is in flight."""
+    import httpx
+    
+    release = asyncio.Event()
+    
+    async def handler(request):
+        if request.headers.get("if-none-match"):
+            await release.wait()
+        return httpx.Response(
+            200,
+            headers={"ETag": '"v1"'},
+            json={"keys": [{"kty": "RSA", "kid": "primary-key", "n": "n", "e": "AQAB"}]}
+        )
+    
+    cache._jwks_urls = ["https://jwks.example/keys"]
+    cache._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    await cache._fetch_jwks("https://jwks.example/keys")
+    
+    pending = asyncio.ensure_future(cache.get_key("rotated-key"))
+    await asyncio.sleep(0)
+    assert cache._inflight
+    
+    key = await asyncio.wait_for(cache.get_key("primary-key"), timeout=1)
+    assert key["kid"] == "primary-key"
+    
+    release.set()
+    assert await pending is None
+
+
+def test_publish_jwks_swaps_snapshot():
+    """Test publishing a JWKS replaces the index by reference and drops rotated-out kids."""
+    cache = JWKSCache()
+    cache._publish_jwks("a/keys", {"keys": [{"kty": "RSA", "kid": "old-key", "n": "n", "e": "AQAB"}]})
+    cache._publish_jwks("b/keys", {"keys": [{"kty": "RSA", "kid": "other-key", "n": "n", "e": "AQAB"}]})
+    index_before = cache._kid_index
+    
+    cache._publish_jwks("a/keys", {"keys": [{"kty": "RSA", "kid": "new-key", "n": "n", "e": "AQAB"}]})
+    
+    assert set(index_before) == {"old-key", "other-key"}
+    assert set(cache._kid_index) == {"new-key", "other-key"}
@@ -1,27 +1,41 @@
 """Tests for TLS functionality."""
 
+from types import SimpleNamespace
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.security.mtls import TLSValidator
+from app.middleware.tls import TLSEnforcementMiddleware
+from app.security.mtls import TLSInfo, TLSValidator
+
 
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def shared_validator():
+    """One TLSValidator for the whole module."""
+    return TLSValidator()
 
 
 @pytest.fixture
-def mock_request():
-    """Mock FastAPI request object."""
-    request = MagicMock()
-    request.headers = {}
-    request.scope = {}
-    return request
+def validator(shared_validator):
+    """The shared validator, with its enabled flag restored after each test."""
+    enabled = shared_validator.enabled
+    yield shared_validator
+    shared_validator.enabled = enabled
+
 
+def make_request(scheme, hostname='example.com', port=None, scope=None):
+    """Build a stand-in request carrying only what TLSValidator reads."""
+    return SimpleNamespace(
+        url=SimpleNamespace(scheme=scheme, hostname=hostname, port=port),
+        headers={},
+        scope=scope if scope is not None else {},
+    )
 
-def test_tls_validator_disabled():
+
+def test_tls_validator_disabled(validator):
     """Test TLS validator when disabled."""
-    validator = TLSValidator()
     validator.enabled = False
     
     # Should return None when disabled
@@ -29,71 +43,86 @@ def test_tls_validator_disabled():
     assert validator.get_tls_protocol(None) is None
 
 
-@pytest.mark.asyncio
-async def test_tls_validation_success(mock_request):
-    """Test successful TLS validation."""
-    validator = TLSValidator()
+def test_tls_info_for_https_request(validator):
+    """Test connection details for an HTTPS request."""
     validator.enabled = True
     
-    # Mock HTTPS request
-    mock_request.url.scheme = 'https'
-    mock_request.url.hostname = 'example.com'
-    mock_request.url.port = 443
+    request = make_request('https', port=443, scope={'extensions': {'tls': {'tls_version': 0x0304}}})
     
-    result = await validator.validate_tls_connection(mock_request)
+    result = validator.get_tls_info(request)
     
     assert result is not None
-    assert result['scheme'] == 'https'
-    assert result['is_secure'] is True
-    assert result['protocol'] == 'TLS 1.3'
+    assert result.scheme == 'https'
+    assert result.is_secure is True
+    assert result.protocol == 'TLS 1.3'
     assert validator.get_tls_scheme(result) == 'https'
     assert validator.get_tls_protocol(result) == 'TLS 1.3'
 
 
-@pytest.mark.asyncio
-async def test_tls_validation_http_request(mock_request):
-    """Test TLS validation with HTTP request (should fail)."""
-    validator = TLSValidator()
-    validator.enabled = True
-    
-    # Mock HTTP request (not HTTPS)
-    mock_request.url.scheme = 'http'
-    mock_request.url.hostname = 'example.com'
-    mock_request.url.port = 80
+def test_tls_info_disabled(validator):
+    """Test no connection details are reported when TLS is disabled."""
+    validator.enabled = False
     
-    with pytest.raises(Exception):  # Should raise HTTPException
-        await validator.validate_tls_connection(mock_request)
+    assert validator.get_tls_info(make_request('https', port=443)) is None
 
 
-def test_tls_info_extraction():
+def test_tls_info_extraction(validator):
     """Test TLS info extraction."""
-    validator = TLSValidator()
-    
-    # Mock request with HTTPS
-    request = MagicMock()
-    request.url.scheme = 'https'
-    request.url.hostname = 'example.com'
-    request.url.port = 443
+    # Request with HTTPS
+    request = make_request('https', port=443, scope={'extensions': {'tls': {'tls_version': 0x0304}}})
     
     result = validator._get_tls_info(request)
     
-    assert result['scheme'] == 'https'
-    assert result['hostname'] == 'example.com'
-    assert result['port'] == 443
-    assert result['is_secure'] is True
-    assert result['protocol'] == 'TLS 1.3'
+    assert result.scheme == 'https'
+    assert result.hostname == 'example.com'
+    assert result.port == 443
+    assert result.is_secure is True
+    assert result.protocol == 'TLS 1.3'
 
 
-def test_tls_scheme_getters():
-    """Test TLS scheme and protocol getters."""
-    validator = TLSValidator()
+def test_tls_protocol_unknown_without_extension(validator):
+    """Test the TLS version is not guessed when the server doesn't report it."""
+    request = make_request('https')
     
+    assert validator._get_tls_info(request).protocol == 'TLS'
+
+
+def test_tls_info_memoized_per_request(validator):
+    """Test connection details are built once per request and reused."""
+    validator.enabled = True
+    request = make_request('https', port=443)
+    
+    first = validator.get_tls_info(request)
+    
+    assert validator.get_tls_info(request) is first
+    assert validator.get_tls_info(make_request('https', port=443)) is not first
+
+
+def test_tls_middleware_rejects_plain_http():
+    """Test protected routes answer 426 over HTTP while probes stay reachable."""
+    http_client = TestClient(app)
+    with patch('app.middleware.tls.settings.tls_enabled', True):
+        response = http_client.get("/api/v1/onboarding/apps")
+        health = http_client.get("/healthz")
+    
+    assert response.status_code == 426
+    assert response.json()["status"] == "tls_error"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert health.status_code == 200
+
+
+def test_tls_middleware_protected_prefix_from_settings():
+    """Test the protected path prefix comes from settings unless overridden."""
+    with patch('app.middleware.tls.settings.tls_protected_prefix', '/secure/'):
+        assert TLSEnforcementMiddleware(app).protected_prefix == '/secure/'
+    
+    assert TLSEnforcementMiddleware(app, protected_prefix='/v2/').protected_prefix == '/v2/'
+
+
+def test_tls_scheme_getters(validator):
+    """Test TLS scheme and protocol getters."""
     # Test with valid TLS info
-    tls_info = {
-        'scheme': 'https',
-        'protocol': 'TLS 1.3',
-        'is_secure': True
-    }
+    tls_info = TLSInfo('https', 'example.com', 443, True, 'TLS 1.3')
     
     assert validator.get_tls_scheme(tls_info) == 'https'
     assert validator.get_tls_protocol(tls_info) == 'TLS 1.3'
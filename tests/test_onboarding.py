@@ -0,0 +1,32 @@
+"""Tests for onboarding response construction."""
+
+import json
+
+from app.api.routes_onboarding import _iter_applications, _stream_applications
+
+
+async def _collect(apps):
+    return b"".join([chunk async for chunk in _stream_applications(apps)])
+
+
+async def _empty():
+    return
+    yield
+
+
+async def test_stream_applications_is_valid_json():
+    """Test the streamed body matches the buffered response shape."""
+    body = json.loads(await _collect(_iter_applications("EBSSH")))
+    
+    assert body["code"] == "200"
+    assert body["status"] == "success"
+    assert body["data"]["total"] == 2
+    assert [app["id"] for app in body["data"]["applications"]] == ["app-001", "app-002"]
+    assert all(app["owner"] == "EBSSH" for app in body["data"]["applications"])
+
+
+async def test_stream_applications_empty():
+    """Test an empty application list still produces valid JSON."""
+    body = json.loads(await _collect(_empty()))
+    
+    assert body["data"] == {"applications": [], "total": 0}
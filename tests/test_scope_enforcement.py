@@ -2,259 +2,205 @@
 
 import pytest
 from unittest.mock import patch, AsyncMock
-from fastapi.testclient import TestClient
 
-from app.main import app
-
-client = TestClient(app)
-
-
-@pytest.fixture
-def mock_jwt_claims_read():
-    """Mock JWT claims with read scope only."""
-    return {
-        "aud": "TSIAM",
-        "scope": ["TSIAM-Read"],
-        "sub": "EBSSH",
-        "jti": "uuid-here",
-        "nbf": 1746523720,
-        "iat": 1746523720,
-        "exp": 1746524020,
-        "iss": "https://idp.example/issuer",
-        "client_id": "test-client"
-    }
-
-
-@pytest.fixture
-def mock_jwt_claims_write():
-    """Mock JWT claims with write scope."""
-    return {
-        "aud": "TSIAM",
-        "scope": ["TSIAM-Read", "TSIAM-Write"],
-        "sub": "EBSSH",
-        "jti": "uuid-here",
-        "nbf": 1746523720,
-        "iat": 1746523720,
-        "exp": 1746524020,
-        "iss": "https://idp.example/issuer",
-        "client_id": "test-client"
-    }
-
-
-@pytest.fixture
-def mock_jwt_claims_no_scope():
-    """Mock JWT claims with no scopes."""
-    return {
-        "aud": "TSIAM",
-        "scope": [],
-        "sub": "EBSSH",
-        "jti": "uuid-here",
-        "nbf": 1746523720,
-        "iat": 1746523720,
-        "exp": 1746524020,
-        "iss": "https://idp.example/issuer",
-        "client_id": "test-client"
-    }
-
-
-@pytest.fixture
-def mock_jwt_token():
-    """Mock JWT token for testing."""
-    return "eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCIsImtpZCI6InRlc3Qta2V5In0.eyJhdWQiOiJUU0lBTSIsInNjb3BlIjpbIlRTSUFNLVJlYWQiXSwic3ViIjoiRUJTU0giLCJqdGkiOiJ1dWlkLWhlcmUiLCJuYmYiOjE3NDY1MjM3MjAsImlhdCI6MTc0NjUyMzcyMCwiZXhwIjoxNzQ2NTI0MDIwLCJpc3MiOiJodHRwczovL2lkcC5leGFtcGxlL2lzc3VlciJ9.signature"
-
-
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_get_onboarding_apps_with_read_scope(mock_get_key, mock_validate_jwt, mock_jwt_claims_read, mock_jwt_token):
-    """Test GET /onboarding/apps with TSIAM-Read scope."""
-    # Mock JWKS key
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
-    }
-    
-    # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims_read, None)
-    
-    response = client.get(
-        "/api/v1/onboarding/apps",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
+from tests._fixtures import AUTH_HEADERS, TEST_CLAIMS_EMPTY, TEST_CLAIMS_READ, TEST_CLAIMS_WRITE, TEST_JWKS_KEY
+
+
+APPS = "/api/v1/onboarding/apps"
+APP_001 = "/api/v1/onboarding/apps/app-001"
+
+# (method, path, claims, json body, expected status, data key on success / scope named on 403)
+CASES = [
+    ("GET", APPS, TEST_CLAIMS_READ, None, 200, "applications"),
+    ("GET", APPS, TEST_CLAIMS_EMPTY, None, 403, "TSIAM-Read"),
+    ("POST", APPS, TEST_CLAIMS_WRITE, {"name": "Test Application", "description": "A test application"}, 201, "application"),
+    ("POST", APPS, TEST_CLAIMS_READ, {"name": "Test Application", "description": "A test application"}, 403, "TSIAM-Write"),
+    ("GET", APP_001, TEST_CLAIMS_READ, None, 200, "application"),
+    ("PUT", APP_001, TEST_CLAIMS_WRITE, {"name": "Updated Application", "status": "active"}, 200, "application"),
+]
+
+
+@pytest.mark.parametrize(
+    "method,path,claims,body,status,expected",
+    CASES,
+    ids=[
+        "get-apps-read",
+        "get-apps-no-scope",
+        "post-apps-write",
+        "post-apps-read-only",
+        "get-app-read",
+        "put-app-write",
+    ],
+)
+async def test_scope_enforcement(aclient, jwt_mocks, method, path, claims, body, status, expected):
+    """Test each onboarding route allows or rejects the caller based on its scopes."""
+    mock_get_key, mock_validate_jwt = jwt_mocks
+    mock_get_key.return_value = TEST_JWKS_KEY
+    mock_validate_jwt.return_value = (claims, None)
+    
+    response = await aclient.request(
+        method,
+        path,
+        headers=AUTH_HEADERS,
+        json=body
     )
     
-    assert response.status_code == 200
+    assert response.status_code == status
     
     data = response.json()
-    assert data["code"] == "200"
-    assert data["status"] == "success"
-    assert "applications" in data["data"]
-
-
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_get_onboarding_apps_without_read_scope(mock_get_key, mock_validate_jwt, mock_jwt_claims_no_scope, mock_jwt_token):
-    """Test GET /onboarding/apps without TSIAM-Read scope."""
-    # Mock JWKS key
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
+    if status == 403:
+        # Scope failures are HTTPExceptions, so their fields sit under "detail"
+        detail = data["detail"]
+        assert detail["code"] == "403"
+        assert detail["status"] == "auth_error"
+        assert "Insufficient scope" in detail["error_message"]
+        assert expected in detail["error_message"]
+    else:
+        assert data["code"] == str(status)
+        assert data["status"] == "success"
+        assert expected in data["data"]
+        if path == APP_001:
+            assert data["data"]["application"]["id"] == "app-001"
+        if body and method == "PUT":
+            assert data["data"]["application"]["name"] == body["name"]
+
+
+def test_check_scope_access_string_and_list_scopes():
+    """Test scope checks accept space-separated and list scope claims."""
+    from app.security.authz import check_scope_access, get_user_scopes
+    
+    string_claims = {"scope": "TSIAM-Read  TSIAM-Write"}
+    list_claims = {"scope": ["TSIAM-Read"]}
+    
+    assert check_scope_access(string_claims, "TSIAM-Write")
+    assert check_scope_access(list_claims, ["TSIAM-Write", "TSIAM-Read"])
+    assert not check_scope_access(list_claims, "TSIAM-Write")
+    assert not check_scope_access({}, "TSIAM-Read")
+    assert get_user_scopes(string_claims) == ["TSIAM-Read", "TSIAM-Write"]
+
+
+async def test_failed_authentication_resolved_once(aclient):
+    """Test a failed get_current_user is not re-run by sibling dependencies."""
+    with patch(
+        'app.security.jwt_validator.jwt_validator.validate_jwt',
+        new=AsyncMock(return_value=(None, "Token validation failed: Invalid audience"))
+    ) as mock_validate:
+        response = await aclient.get(
+            "/api/v1/onboarding/apps",
+            headers=AUTH_HEADERS
+        )
+    
+    assert response.status_code == 401
+    assert mock_validate.await_count == 1
+
+
+async def test_auth_errors_rendered_as_json_detail(aclient):
+    """Test HTTPException errors keep the {"detail": ...} body shape."""
+    response = await aclient.get("/api/v1/onboarding/apps")
+    
+    assert response.status_code == 401
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "detail": {
+            "code": "401",
+            "status": "auth_error",
+            "error_message": "Authorization header required"
+        }
     }
-    
-    # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims_no_scope, None)
-    
-    response = client.get(
-        "/api/v1/onboarding/apps",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
-    )
-    
-    assert response.status_code == 403
-    
-    data = response.json()
-    assert data["code"] == "403"
-    assert data["status"] == "auth_error"
-    assert "Insufficient scope" in data["error_message"]
-    assert "TSIAM-Read" in data["error_message"]
 
 
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_post_onboarding_apps_with_write_scope(mock_get_key, mock_validate_jwt, mock_jwt_claims_write, mock_jwt_token):
-    """Test POST /onboarding/apps with TSIAM-Write scope."""
-    # Mock JWKS key
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
-    }
-    
-    # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims_write, None)
+def test_get_bearer_token_parsing():
+    """Test the Authorization header parser accepts only non-empty bearer credentials."""
+    from starlette.requests import Request
+    from app.security.deps import get_bearer_token
     
-    app_data = {
-        "name": "Test Application",
-        "description": "A test application"
-    }
+    def request_with(*headers):
+        return Request({"type": "http", "headers": list(headers)})
     
-    response = client.post(
-        "/api/v1/onboarding/apps",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"},
-        json=app_data
-    )
-    
-    assert response.status_code == 201
-    
-    data = response.json()
-    assert data["code"] == "201"
-    assert data["status"] == "success"
-    assert "application" in data["data"]
+    assert get_bearer_token(request_with((b"authorization", b"Bearer abc.def.ghi"))) == "abc.def.ghi"
+    assert get_bearer_token(request_with((b"authorization", b"bearer abc"))) == "abc"
+    assert get_bearer_token(request_with((b"authorization", b"Basic dXNlcjpwYXNz"))) is None
+    assert get_bearer_token(request_with((b"authorization", b"Bearer "))) is None
+    assert get_bearer_token(request_with()) is None
 
 
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_post_onboarding_apps_without_write_scope(mock_get_key, mock_validate_jwt, mock_jwt_claims_read, mock_jwt_token):
-    """Test POST /onboarding/apps without TSIAM-Write scope."""
-    # Mock JWKS key
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
-    }
-    
-    # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims_read, None)
-    
-    app_data = {
-        "name": "Test Application",
-        "description": "A test application"
-    }
-    
-    response = client.post(
-        "/api/v1/onboarding/apps",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"},
-        json=app_data
-    )
+async def test_identity_dependencies_independent_of_declaration_order(jwt_mocks):
+    """Test identity helpers declared before any scope dependency still authenticate."""
+    import httpx
+    from fastapi import Depends, FastAPI
+    from app.security.deps import get_client_id, get_user_id, get_user_scopes, require_scope
     
-    assert response.status_code == 403
+    mock_get_key, mock_validate_jwt = jwt_mocks
+    mock_get_key.return_value = TEST_JWKS_KEY
+    mock_validate_jwt.return_value = (TEST_CLAIMS_READ, None)
     
-    data = response.json()
-    assert data["code"] == "403"
-    assert data["status"] == "auth_error"
-    assert "Insufficient scope" in data["error_message"]
-    assert "TSIAM-Write" in data["error_message"]
-
-
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_get_specific_onboarding_app_with_read_scope(mock_get_key, mock_validate_jwt, mock_jwt_claims_read, mock_jwt_token):
-    """Test GET /onboarding/apps/{app_id} with TSIAM-Read scope."""
-    # Mock JWKS key
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
-    }
+    identity_app = FastAPI()
     
-    # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims_read, None)
+    @identity_app.get("/whoami")
+    async def whoami(
+        client_id: str = Depends(get_client_id),
+        user_id: str = Depends(get_user_id),
+        scopes: list = Depends(get_user_scopes),
+        current_user: dict = Depends(require_scope("TSIAM-Read"))
+    ):
+        return {"client_id": client_id, "user_id": user_id, "scopes": scopes}
     
-    response = client.get(
-        "/api/v1/onboarding/apps/app-001",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
-    )
+    transport = httpx.ASGITransport(app=identity_app)
+    async with httpx.AsyncClient(transport=transport, base_url="https://testserver") as client:
+        response = await client.get("/whoami", headers=AUTH_HEADERS)
+        missing = await client.get("/whoami")
     
     assert response.status_code == 200
-    
-    data = response.json()
-    assert data["code"] == "200"
-    assert data["status"] == "success"
-    assert "application" in data["data"]
-    assert data["data"]["application"]["id"] == "app-001"
-
-
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_put_onboarding_app_with_write_scope(mock_get_key, mock_validate_jwt, mock_jwt_claims_write, mock_jwt_token):
-    """Test PUT /onboarding/apps/{app_id} with TSIAM-Write scope."""
-    # Mock JWKS key
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
-    }
-    
-    # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims_write, None)
-    
-    app_data = {
-        "name": "Updated Application",
-        "status": "active"
+    assert response.json() == {
+        "client_id": TEST_CLAIMS_READ["client_id"],
+        "user_id": TEST_CLAIMS_READ["sub"],
+        "scopes": ["TSIAM-Read"],
     }
-    
-    response = client.put(
-        "/api/v1/onboarding/apps/app-001",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"},
-        json=app_data
-    )
-    
-    assert response.status_code == 200
-    
-    data = response.json()
-    assert data["code"] == "200"
-    assert data["status"] == "success"
-    assert "application" in data["data"]
-    assert data["data"]["application"]["id"] == "app-001"
-    assert data["data"]["application"]["name"] == "Updated Application"
+    assert missing.status_code == 401
+    assert mock_validate_jwt.await_count == 1
+
+
+@pytest.mark.parametrize("scope, expected_status", [("TSIAM-Read", 200), ("TSIAM-Write", 403)])
+async def test_scope_check_with_overridden_current_user(scope, expected_status):
+    """Test scope dependencies read the overridden user's claims when get_current_user is replaced."""
+    import httpx
+    from fastapi import Depends, FastAPI
+    from app.security.deps import get_current_user, require_any_scope, require_scope
+    
+    scoped_app = FastAPI()
+    scoped_app.dependency_overrides[get_current_user] = lambda: TEST_CLAIMS_READ
+    
+    @scoped_app.get("/scoped")
+    async def scoped(
+        current_user: dict = Depends(require_scope(scope)),
+        any_user: dict = Depends(require_any_scope([scope]))
+    ):
+        return {"sub": current_user["sub"]}
+    
+    transport = httpx.ASGITransport(app=scoped_app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="https://testserver") as client:
+        response = await client.get("/scoped")
+    
+    assert response.status_code == expected_status
+
+
+async def test_optional_and_current_user_reuse_request_claims():
+    """Test claims resolved once per request are reused instead of re-validated."""
+    from starlette.requests import Request
+    from app.security.deps import get_current_user, get_optional_user
+    
+    claims = {"sub": "EBSSH", "client_id": "test-client", "scope": ["TSIAM-Read"]}
+    request = Request({
+        "type": "http", "scheme": "https", "server": ("testserver", 443), "path": "/",
+        "headers": [(b"authorization", b"Bearer token")], "state": {}
+    })
+    
+    with patch(
+        'app.security.jwt_validator.jwt_validator.validate_jwt',
+        new=AsyncMock(return_value=(claims, None))
+    ) as mock_validate:
+        assert await get_optional_user(request) == claims
+        assert await get_current_user(request) == claims
+        assert await get_optional_user(request) == claims
+    
+    assert mock_validate.await_count == 1
@@ -0,0 +1,76 @@
+"""Tests for the token verification result cache."""
+
+import time
+
+from unittest.mock import patch, AsyncMock
+
+from app.security.jwt_validator import TOKEN_EXPIRED_ERROR, jwt_validator
+
+
+async def test_successful_validation_is_cached():
+    """Test a replayed token is not re-verified."""
+    claims = {"sub": "EBSSH", "exp": time.time() + 300}
+    with patch(
+        'app.security.jwt_validator.jwt_validator._validate_uncached',
+        new=AsyncMock(return_value=(claims, None))
+    ) as mock_validate:
+        assert await jwt_validator.validate_jwt("token-a") == (claims, None)
+        assert await jwt_validator.validate_jwt("token-a") == (claims, None)
+    
+    assert mock_validate.await_count == 1
+
+
+async def test_expired_token_result_is_cached():
+    """Test an expired token short-circuits on replay."""
+    with patch(
+        'app.security.jwt_validator.jwt_validator._validate_uncached',
+        new=AsyncMock(return_value=(None, TOKEN_EXPIRED_ERROR))
+    ) as mock_validate:
+        await jwt_validator.validate_jwt("token-b")
+        claims, error = await jwt_validator.validate_jwt("token-b")
+    
+    assert claims is None
+    assert error == TOKEN_EXPIRED_ERROR
+    assert mock_validate.await_count == 1
+
+
+async def test_transient_failure_is_not_cached():
+    """Test an unknown-key failure is retried on the next request."""
+    error = "Token validation failed: Key 'test-key' not found"
+    with patch(
+        'app.security.jwt_validator.jwt_validator._validate_uncached',
+        new=AsyncMock(return_value=(None, error))
+    ) as mock_validate:
+        await jwt_validator.validate_jwt("token-c")
+        await jwt_validator.validate_jwt("token-c")
+    
+    assert mock_validate.await_count == 2
+
+
+async def test_cached_claims_not_served_past_expiry():
+    """Test cached claims are re-verified once the token is past exp and leeway."""
+    claims = {"sub": "EBSSH", "exp": time.time() - 300}
+    with patch(
+        'app.security.jwt_validator.jwt_validator._validate_uncached',
+        new=AsyncMock(return_value=(claims, None))
+    ) as mock_validate:
+        await jwt_validator.validate_jwt("token-d")
+        await jwt_validator.validate_jwt("token-d")
+    
+    assert mock_validate.await_count == 2
+
+
+async def test_cache_evicts_least_recently_used():
+    """Test the cache stays bounded by evicting the oldest entry."""
+    claims = {"sub": "EBSSH", "exp": time.time() + 300}
+    with patch('app.security.jwt_validator.TOKEN_CACHE_SIZE', 2), patch(
+        'app.security.jwt_validator.jwt_validator._validate_uncached',
+        new=AsyncMock(return_value=(claims, None))
+    ) as mock_validate:
+        await jwt_validator.validate_jwt("token-e")
+        await jwt_validator.validate_jwt("token-f")
+        await jwt_validator.validate_jwt("token-e")
+        await jwt_validator.validate_jwt("token-g")
+        await jwt_validator.validate_jwt("token-f")
+    
+    assert mock_validate.await_count == 4
@@ -1,55 +1,25 @@
 """Tests for successful JWT validation."""
 
-import pytest
-from unittest.mock import patch, AsyncMock
-from fastapi.testclient import TestClient
+from tests._fixtures import TEST_CLAIMS_WRITE, TEST_JWKS_KEY
 
-from app.main import app
+# Token carrying both read and write scopes
+READ_WRITE_JWT_TOKEN = "eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCIsImtpZCI6InRlc3Qta2V5In0.eyJhdWQiOiJUU0lBTSIsInNjb3BlIjpbIlRTSUFNLVJlYWQiLCJUU0lBTS1Xcml0ZSJdLCJzdWIiOiJFQlNTSCIsImp0aSI6InV1aWQtaGVyZSIsIm5iZiI6MTc0NjUyMzcyMCwiaWF0IjoxNzQ2NTIzNzIwLCJleHAiOjE3NDY1MjQwMjAsImlzcyI6Imh0dHBzOi8vaWRwLmV4YW1wbGUvaXNzdWVyIiwiY2xpZW50X2lkIjoidGVzdC1jbGllbnQifQ.signature"
+READ_WRITE_AUTH_HEADERS = {"Authorization": f"Bearer {READ_WRITE_JWT_TOKEN}"}
 
-client = TestClient(app)
 
-
-@pytest.fixture
-def mock_jwt_claims():
-    """Mock JWT claims for testing."""
-    return {
-        "aud": "TSIAM",
-        "scope": ["TSIAM-Read", "TSIAM-Write"],
-        "sub": "EBSSH",
-        "jti": "uuid-here",
-        "nbf": 1746523720,
-        "iat": 1746523720,
-        "exp": 1746524020,
-        "iss": "https://idp.example/issuer",
-        "client_id": "test-client"
-    }
-
-
-@pytest.fixture
-def mock_jwt_token():
-    """Mock JWT token for testing."""
-    return "eyJhbGciOiJSUzI1NiIsInR5cCI6IkpXVCIsImtpZCI6InRlc3Qta2V5In0.eyJhdWQiOiJUU0lBTSIsInNjb3BlIjpbIlRTSUFNLVJlYWQiLCJUU0lBTS1Xcml0ZSJdLCJzdWIiOiJFQlNTSCIsImp0aSI6InV1aWQtaGVyZSIsIm5iZiI6MTc0NjUyMzcyMCwiaWF0IjoxNzQ2NTIzNzIwLCJleHAiOjE3NDY1MjQwMjAsImlzcyI6Imh0dHBzOi8vaWRwLmV4YW1wbGUvaXNzdWVyIiwiY2xpZW50X2lkIjoidGVzdC1jbGllbnQifQ.signature"
-
-
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_validate_token_success(mock_get_key, mock_validate_jwt, mock_jwt_claims, mock_jwt_token):
+async def test_validate_token_success(aclient, jwt_mocks):
     """Test successful JWT validation."""
+    mock_get_key, mock_validate_jwt = jwt_mocks
+    
     # Mock JWKS key
-    mock_get_key.return_value = {
-        "kty": "RSA",
-        "kid": "test-key",
-        "use": "sig",
-        "n": "test-n",
-        "e": "AQAB"
-    }
+    mock_get_key.return_value = TEST_JWKS_KEY
     
     # Mock JWT validation
-    mock_validate_jwt.return_value = (mock_jwt_claims, None)
+    mock_validate_jwt.return_value = (TEST_CLAIMS_WRITE, None)
     
-    response = client.post(
+    response = await aclient.post(
         "/api/v1/auth/validate",
-        headers={"Authorization": f"Bearer {mock_jwt_token}"}
+        headers=READ_WRITE_AUTH_HEADERS
     )
     
     assert response.status_code == 200
@@ -57,34 +27,30 @@ async def test_validate_token_success(mock_get_key, mock_validate_jwt, mock_jwt_
     data = response.json()
     assert data["code"] == "200"
     assert data["status"] == "success"
-    assert data["claims"] == mock_jwt_claims
+    assert data["claims"] == TEST_CLAIMS_WRITE
 
 
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_validate_token_missing_auth_header(mock_get_key, mock_validate_jwt):
+async def test_validate_token_missing_auth_header(aclient):
     """Test JWT validation with missing authorization header."""
-    response = client.post("/api/v1/auth/validate")
+    response = await aclient.post("/api/v1/auth/validate")
     
     assert response.status_code == 401
     
-    data = response.json()
+    data = response.json()["detail"]
     assert data["code"] == "401"
     assert data["status"] == "auth_error"
     assert "Authorization header required" in data["error_message"]
 
 
-@patch('app.security.jwt_validator.jwt_validator.validate_jwt')
-@patch('app.security.jwks_cache.jwks_cache.get_key')
-async def test_validate_token_invalid_format(mock_get_key, mock_validate_jwt):
+async def test_validate_token_invalid_format(aclient):
     """Test JWT validation with invalid token format."""
-    response = client.post(
+    response = await aclient.post(
         "/api/v1/auth/validate",
         headers={"Authorization": "InvalidFormat token"}
     )
     
     assert response.status_code == 401
     
-    data = response.json()
+    data = response.json()["detail"]
     assert data["code"] == "401"
     assert data["status"] == "auth_error"
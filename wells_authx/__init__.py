@@ -1,7 +1,17 @@
 """Wells Fargo AuthX integration for COP Guard - Apigee Only."""
 
-from .security import WellsAuthenticator, container
-from .config import WellsAuthConfig
-
 __all__ = ["WellsAuthenticator", "WellsAuthConfig", "container"]
 
+
+def __getattr__(name):
+    # Import submodules on first use so importing the package stays cheap
+    if name == "WellsAuthenticator":
+        from .security import WellsAuthenticator
+        return WellsAuthenticator
+    if name == "WellsAuthConfig":
+        from .config import WellsAuthConfig
+        return WellsAuthConfig
+    if name == "container":
+        from .security import container
+        return container
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
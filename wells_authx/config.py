@@ -1,8 +1,21 @@
 """Configuration for Wells Fargo AuthX integration - Apigee Only."""
 
+from functools import cached_property, lru_cache
+from types import MappingProxyType
 from typing import Optional
 from pydantic import field_validator
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+_ENVIRONMENTS = ('dev', 'sit', 'prod')
+_ALLOWED_ENVIRONMENTS = frozenset(_ENVIRONMENTS)
+_HTTPS_PREFIX = 'https://'
+
+# Default Apigee JWKS URLs by environment
+_APIGEE_JWKS_URLS = MappingProxyType({
+    'dev': 'https://jwks-service-dev.cfapps.wellsfargo.net/publickey/getKeys',
+    'sit': 'https://jwks-service-sit.cfapps.wellsfargo.net/publickey/getKeys',
+    'prod': 'https://jwks-service-prod.cfapps.wellsfargo.net/publickey/getKeys'
+})
 
 
 class WellsAuthConfig(BaseSettings):
@@ -22,40 +35,54 @@ class WellsAuthConfig(BaseSettings):
     validate_claims: bool = True
     validate_certificate: bool = True
     
-    model_config = {
-        "env_file": ".env",
-        "case_sensitive": False,
-        "env_prefix": "WELLS_AUTH_"
-    }
+    # Verified-token cache (opt-in); skips re-verifying a token seen moments ago
+    verification_cache_enabled: bool = False
+    verification_cache_ttl_sec: float = 5.0
+    verification_cache_size: int = 10000
+    
+    # Seconds browsers may cache a CORS preflight response
+    cors_max_age_sec: int = 86400
+    
+    # Read once at startup and never reassigned, so freeze it
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        env_prefix="WELLS_AUTH_",
+        frozen=True,
+        validate_assignment=False
+    )
     
     @field_validator('environment')
     @classmethod
     def validate_environment(cls, v):
-        allowed_envs = ['dev', 'sit', 'prod']
-        if v not in allowed_envs:
-            raise ValueError(f'Environment must be one of: {allowed_envs}')
+        if v not in _ALLOWED_ENVIRONMENTS:
+            raise ValueError(f'Environment must be one of: {list(_ENVIRONMENTS)}')
         return v
     
     @field_validator('apigee_jwks_url')
     @classmethod
     def validate_jwks_url(cls, v):
-        if v and not v.startswith('https://'):
+        if v and not v.startswith(_HTTPS_PREFIX):
             raise ValueError('JWKS URLs must use HTTPS')
         return v
     
+    @cached_property
+    def apigee_jwks_url_resolved(self) -> str:
+        """Apigee JWKS URL: the configured one, else the default for the environment."""
+        return self.apigee_jwks_url or _APIGEE_JWKS_URLS.get(self.environment, _APIGEE_JWKS_URLS['dev'])
+    
     def get_apigee_jwks_url(self) -> str:
         """Get Apigee JWKS URL based on environment."""
-        if self.apigee_jwks_url:
-            return self.apigee_jwks_url
-        
-        # Default URLs based on environment
-        urls = {
-            'dev': 'https://jwks-service-dev.cfapps.wellsfargo.net/publickey/getKeys',
-            'sit': 'https://jwks-service-sit.cfapps.wellsfargo.net/publickey/getKeys',
-            'prod': 'https://jwks-service-prod.cfapps.wellsfargo.net/publickey/getKeys'
-        }
-        return urls.get(self.environment, urls['dev'])
-
-
-# Global Wells Auth configuration
-wells_auth_config = WellsAuthConfig()
\ No newline at end of file
+        return self.apigee_jwks_url_resolved
+
+@lru_cache(maxsize=1)
+def get_wells_auth_config() -> WellsAuthConfig:
+    """Shared Wells Auth configuration, read from the environment on first use."""
+    return WellsAuthConfig()
+
+
+def __getattr__(name):
+    # Keep the old module-level wells_auth_config working without building it at import
+    if name == "wells_auth_config":
+        return get_wells_auth_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
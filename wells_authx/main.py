@@ -2,12 +2,15 @@
 
 import asyncio
 import logging
-import uuid
+import secrets
 import os
-from functools import wraps
-from typing import Dict, Any, Optional, Tuple
+import time
+from functools import lru_cache, wraps
+from typing import Dict, Any, NamedTuple, Optional, Tuple
 
-from flask import Flask, request, jsonify, g
+import orjson
+from flask import Flask, Response, request, jsonify, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
 # Import with error handling
@@ -19,9 +22,10 @@ except ImportError as e:
     logging.error(f"Failed to import required modules: {e}")
     raise RuntimeError(f"Missing required dependencies: {e}")
 
-# Setup basic logging
+# Setup basic logging; LOG_LEVEL=warning keeps per-request INFO records off
+# the (locked) stdout handler entirely
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOG_LEVEL", "info").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
@@ -40,9 +44,36 @@ except Exception as e:
     logger.error(f"Failed to initialize Wells Fargo AuthX configuration: {e}")
     raise RuntimeError(f"Configuration initialization failed: {e}")
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    
+    jsonify() responses (notably the claims echoed by the validate route)
+    are encoded straight to bytes; types orjson doesn't know fall back to
+    Flask's default handler.
+    """
+    
+    # Keep claims in issuer order, as JSON_SORT_KEYS=False intended
+    sort_keys = False
+    
+    def _dumpb(self, obj: Any) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._dumpb(obj).decode()
+    
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj), mimetype=self.mimetype)
+
+
 # Create Flask application
 app = Flask(__name__)
-CORS(app)
+app.json = OrjsonProvider(app)
+CORS(app, max_age=wells_auth_config.cors_max_age_sec)
 
 # Configuration
 app.config['JSON_SORT_KEYS'] = False
@@ -50,6 +81,58 @@ app.config['JSON_SORT_KEYS'] = False
 # Register Routes
 register_routes(app)
 
+# Provider info changes rarely (once, when the authenticator initializes), but
+# health probes ask for it constantly; reuse a short-lived snapshot with its
+# response bodies already encoded
+_PROVIDER_INFO_TTL_SEC = 5.0
+
+
+class _ProviderInfoSnapshot(NamedTuple):
+    expires_at: float
+    authenticator: Any
+    info: Dict[str, Any]
+    info_body: bytes
+    health_body: bytes
+
+
+_provider_info_snapshot: Optional[_ProviderInfoSnapshot] = None
+
+
+def _json_body_response(body: bytes) -> Response:
+    return Response(body, mimetype="application/json")
+
+
+def _get_provider_info_snapshot() -> _ProviderInfoSnapshot:
+    """Return the current provider-info snapshot, refreshing it after the TTL."""
+    global _provider_info_snapshot
+    authenticator = container.get_authenticator()
+    snapshot = _provider_info_snapshot
+    now = time.monotonic()
+    if snapshot is None or now >= snapshot.expires_at or snapshot.authenticator is not authenticator:
+        info = authenticator.get_provider_info()
+        ready = info.get("initialized", False)
+        snapshot = _ProviderInfoSnapshot(
+            expires_at=now + _PROVIDER_INFO_TTL_SEC,
+            authenticator=authenticator,
+            info=info,
+            info_body=orjson.dumps({
+                "code": "200",
+                "status": "success",
+                "wells_authx_info": info
+            }),
+            health_body=orjson.dumps({
+                "code": "200",
+                "status": "success",
+                "health": "healthy" if ready else "degraded",
+                "wells_authx_ready": ready,
+                "environment": info.get("environment", "unknown"),
+                "provider": "apigee"
+            })
+        )
+        _provider_info_snapshot = snapshot
+    return snapshot
+
+
 # Add Wells Fargo AuthX specific routes
 from flask import Blueprint
 
@@ -61,19 +144,20 @@ wells_authx_bp = Blueprint('wells_authx', __name__, url_prefix='/api/v1')
 def validate_wells_token():
     """Validate JWT token using Wells Fargo AuthX Apigee."""
     current_user = g.current_user
-    correlation_id = getattr(g, 'correlation_id', 'unknown')
+    correlation_id = g.correlation_id
     
-    logger.info(
-        "Wells Fargo Apigee token validation requested",
-        extra={
-            "correlation_id": correlation_id,
-            "sub": current_user.get('sub'),
-            "client_id": current_user.get('client_id'),
-            "iss": current_user.get('iss'),
-            "aud": current_user.get('aud'),
-            "provider": getattr(g, 'auth_provider', 'apigee')
-        }
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Wells Fargo Apigee token validation requested",
+            extra={
+                "correlation_id": correlation_id,
+                "sub": current_user.get('sub'),
+                "client_id": current_user.get('client_id'),
+                "iss": current_user.get('iss'),
+                "aud": current_user.get('aud'),
+                "provider": getattr(g, 'auth_provider', 'apigee')
+            }
+        )
     
     return jsonify({
         "code": "200",
@@ -87,14 +171,7 @@ def validate_wells_token():
 def get_wells_auth_info():
     """Get Wells Fargo AuthX Apigee configuration information."""
     try:
-        authenticator = container.get_authenticator()
-        provider_info = authenticator.get_provider_info()
-        
-        return jsonify({
-            "code": "200",
-            "status": "success",
-            "wells_authx_info": provider_info
-        })
+        return _json_body_response(_get_provider_info_snapshot().info_body)
     except Exception as e:
         logger.error("Failed to get Wells AuthX info", extra={"error": str(e)})
         return jsonify({
@@ -107,19 +184,7 @@ def get_wells_auth_info():
 def wells_auth_health_check():
     """Health check for Wells Fargo AuthX Apigee integration."""
     try:
-        authenticator = container.get_authenticator()
-        provider_info = authenticator.get_provider_info()
-        
-        health_status = "healthy" if provider_info.get("initialized", False) else "degraded"
-        
-        return jsonify({
-            "code": "200",
-            "status": "success",
-            "health": health_status,
-            "wells_authx_ready": provider_info.get("initialized", False),
-            "environment": provider_info.get("environment", "unknown"),
-            "provider": "apigee"
-        })
+        return _json_body_response(_get_provider_info_snapshot().health_body)
     except Exception as e:
         logger.error("Wells AuthX health check failed", extra={"error": str(e)})
         return jsonify({
@@ -133,56 +198,80 @@ def wells_auth_health_check():
 app.register_blueprint(wells_authx_bp)
 
 
-def add_security_headers(response):
-    """Add modern security headers to all responses."""
+# Security headers, built once at import. SECURITY_HEADERS selects how many
+# this service adds: "full" (default), "minimal" when an ingress supplies the
+# policy headers, or "off" when it supplies them all. BEHIND_PROXY drops HSTS.
+_SECURITY_HEADERS_MODE = os.getenv("SECURITY_HEADERS", "full").lower()
+
+_MINIMAL_SECURITY_HEADERS = (
     # Prevent MIME type sniffing
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    
+    ("X-Content-Type-Options", "nosniff"),
     # Prevent clickjacking
-    response.headers["X-Frame-Options"] = "DENY"
-    
+    ("X-Frame-Options", "DENY"),
+)
+
+_FULL_SECURITY_HEADERS = _MINIMAL_SECURITY_HEADERS + (
     # Control referrer information
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    # Content Security Policy (basic)
+    ("Content-Security-Policy", "default-src 'self'; script-src 'self'; style-src 'self' 'unsafe-inline'; img-src 'self' data:; font-src 'self'"),
+    # Permissions Policy (formerly Feature Policy)
+    ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+)
+
+if _SECURITY_HEADERS_MODE == "off":
+    _SECURITY_HEADERS = ()
+elif _SECURITY_HEADERS_MODE == "minimal":
+    _SECURITY_HEADERS = _MINIMAL_SECURITY_HEADERS
+else:
+    if _SECURITY_HEADERS_MODE != "full":
+        logger.warning(f"Unknown SECURITY_HEADERS mode {_SECURITY_HEADERS_MODE!r}; using 'full'")
+    _SECURITY_HEADERS = _FULL_SECURITY_HEADERS
     
     # Enforce HTTPS (only if not behind a proxy that handles this)
     if not os.getenv("BEHIND_PROXY", "false").lower() == "true":
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains; preload"
-    
-    # Content Security Policy (basic)
-    response.headers["Content-Security-Policy"] = "default-src 'self'; script-src 'self'; style-src 'self' 'unsafe-inline'; img-src 'self' data:; font-src 'self'"
+        _SECURITY_HEADERS += (
+            ("Strict-Transport-Security", "max-age=31536000; includeSubDomains; preload"),
+        )
+
+_EDGE_HEADER_NAMES = frozenset(name.lower() for name, _ in _SECURITY_HEADERS) | {"server", "x-correlation-id"}
+
+CORRELATION_ID_ENVIRON_KEY = "wells_authx.correlation_id"
+
+
+class WellsEdgeMiddleware:
+    """
+    Plain WSGI middleware for per-request edge work, done in one pass.
     
-    # Permissions Policy (formerly Feature Policy)
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+    Generates the correlation ID (shared with Flask via the WSGI environ)
+    and appends it with the prebuilt security headers to the start_response
+    list, so no Response object is touched per request. Any app-set copies
+    of these headers (and the Server header) are dropped.
+    """
     
-    # Remove server information
-    response.headers.pop("Server", None)
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
     
-    return response
+    def __call__(self, environ, start_response):
+        correlation_id = secrets.token_hex(16)
+        environ[CORRELATION_ID_ENVIRON_KEY] = correlation_id
+        
+        def start_response_with_headers(status, headers, exc_info=None):
+            headers = [h for h in headers if h[0].lower() not in _EDGE_HEADER_NAMES]
+            headers.extend(_SECURITY_HEADERS)
+            headers.append(("X-Correlation-ID", correlation_id))
+            return start_response(status, headers, exc_info)
+        
+        return self.wsgi_app(environ, start_response_with_headers)
 
 
-def add_correlation_id():
-    """Add correlation ID to requests."""
-    correlation_id = str(uuid.uuid4())
-    g.correlation_id = correlation_id
-    return correlation_id
+app.wsgi_app = WellsEdgeMiddleware(app.wsgi_app)
 
 
 @app.before_request
 def before_request():
-    """Execute before each request."""
-    add_correlation_id()
-
-
-@app.after_request
-def after_request(response):
-    """Execute after each request."""
-    # Add correlation ID to response headers
-    if hasattr(g, 'correlation_id'):
-        response.headers["X-Correlation-ID"] = g.correlation_id
-    
-    # Add security headers
-    response = add_security_headers(response)
-    return response
+    """Expose the middleware's correlation ID to routes via g."""
+    g.correlation_id = request.environ[CORRELATION_ID_ENVIRON_KEY]
 
 
 # Error handlers
@@ -199,7 +288,8 @@ def not_found(error):
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors."""
-    correlation_id = getattr(g, 'correlation_id', 'unknown')
+    # before_request may not have run if the failure happened ahead of it
+    correlation_id = g.get('correlation_id', 'unknown')
     logger.error(f"Internal server error - {correlation_id}: {error}")
     
     return jsonify({
@@ -210,33 +300,61 @@ def internal_error(error):
 
 
 # Routes
-@app.route("/", methods=["GET"])
-def root():
-    """Root endpoint."""
-    return jsonify({
-        "service": "Wells Fargo AuthX Service",
+# Static response bodies, serialized once; config-derived ones are built on
+# first use per (frozen) config object
+_ROOT_BODY = orjson.dumps({
+    "service": "Wells Fargo AuthX Service",
+    "version": "1.0.0",
+    "status": "running",
+    "provider": "apigee"
+})
+
+
+@lru_cache(maxsize=4)
+def _healthy_body(config) -> bytes:
+    return orjson.dumps({
+        "status": "healthy",
+        "service": "wells-authx",
         "version": "1.0.0",
-        "status": "running",
+        "provider": "apigee",
+        "environment": config.environment,
+        "initialized": True
+    })
+
+
+@lru_cache(maxsize=4)
+def _config_body(config) -> bytes:
+    return orjson.dumps({
+        "environment": config.environment,
+        "auto_refresh": config.auto_refresh,
+        "validate_claims": config.validate_claims,
+        "validate_certificate": config.validate_certificate,
         "provider": "apigee"
     })
 
 
+@app.route("/", methods=["GET"])
+def root():
+    """Root endpoint."""
+    return _json_body_response(_ROOT_BODY)
+
+
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint."""
     try:
-        authenticator = container.get_authenticator()
         config = container.get_config()
-        provider_info = authenticator.get_provider_info()
-        health_status = "healthy" if provider_info.get("initialized", False) else "degraded"
+        provider_info = _get_provider_info_snapshot().info
+        if provider_info.get("initialized", False):
+            return _json_body_response(_healthy_body(config))
         
         return jsonify({
-            "status": health_status,
+            "status": "degraded",
             "service": "wells-authx",
             "version": "1.0.0",
             "provider": "apigee",
             "environment": config.environment,
-            "initialized": provider_info.get("initialized", False)
+            "initialized": False
         })
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -252,14 +370,7 @@ def health():
 def get_config():
     """Get current configuration (non-sensitive info only)."""
     try:
-        config = container.get_config()
-        return jsonify({
-            "environment": config.environment,
-            "auto_refresh": config.auto_refresh,
-            "validate_claims": config.validate_claims,
-            "validate_certificate": config.validate_certificate,
-            "provider": "apigee"
-        })
+        return _json_body_response(_config_body(container.get_config()))
     except Exception as e:
         logger.error(f"Failed to get configuration: {e}")
         return jsonify({
@@ -270,8 +381,6 @@ def get_config():
 
 
 if __name__ == "__main__":
-    import os
-    
     # Get configuration
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
@@ -11,7 +11,9 @@ from security import (
     require_object_permission,
     require_functional_access,
     AccessLevel,
-    ResourceType
+    ResourceType,
+    Permission,
+    access_control_policy
 )
 
 logger = logging.getLogger(__name__)
@@ -28,7 +30,7 @@ def register_routes(app):
     def health_check():
         """Health check endpoint - no authentication required."""
         transaction_id = str(uuid.uuid4())
-        correlation_id = getattr(g, 'correlation_id', transaction_id)
+        correlation_id = g.correlation_id
         
         app.logger.info(f"Transaction ID: {transaction_id} - Health check endpoint called")
         logger.info(
@@ -61,7 +63,7 @@ def register_routes(app):
         Requires authentication and functional access to 'apigee_management'.
         """
         transaction_id = str(uuid.uuid4())
-        correlation_id = getattr(g, 'correlation_id', transaction_id)
+        correlation_id = g.correlation_id
         current_user = g.current_user
         
         app.logger.info(
@@ -129,7 +131,7 @@ def register_routes(app):
         Requires authentication and functional access to 'jira_access'.
         """
         transaction_id = str(uuid.uuid4())
-        correlation_id = getattr(g, 'correlation_id', transaction_id)
+        correlation_id = g.correlation_id
         current_user = g.current_user
         
         app.logger.info(
@@ -198,7 +200,7 @@ def register_routes(app):
         Requires authentication, functional access to 'jira_management', and 'write' scope.
         """
         transaction_id = str(uuid.uuid4())
-        correlation_id = getattr(g, 'correlation_id', transaction_id)
+        correlation_id = g.correlation_id
         current_user = g.current_user
         
         app.logger.info(f"Transaction ID: {transaction_id} - handle_ticket called")
@@ -288,7 +290,7 @@ def register_routes(app):
         Requires authentication and functional access to 'jira_query'.
         """
         transaction_id = str(uuid.uuid4())
-        correlation_id = getattr(g, 'correlation_id', transaction_id)
+        correlation_id = g.correlation_id
         current_user = g.current_user
         
         app.logger.info(
@@ -369,7 +371,7 @@ def register_routes(app):
         Requires authentication and functional access to 'jira_status'.
         """
         transaction_id = str(uuid.uuid4())
-        correlation_id = getattr(g, 'correlation_id', transaction_id)
+        correlation_id = g.correlation_id
         current_user = g.current_user
         
         app.logger.info(
@@ -433,7 +435,7 @@ def register_routes(app):
     def get_user_permissions():
         """Get current user's permissions and access information."""
         current_user = g.current_user
-        correlation_id = getattr(g, 'correlation_id', 'unknown')
+        correlation_id = g.correlation_id
         
         # Extract permission information
         permissions_info = {
@@ -469,7 +471,7 @@ def register_routes(app):
     def test_permission():
         """Test a specific permission for the current user."""
         current_user = g.current_user
-        correlation_id = getattr(g, 'correlation_id', 'unknown')
+        correlation_id = g.correlation_id
         test_data = request.get_json() or {}
         
         resource_type = test_data.get('resource_type')
@@ -485,8 +487,6 @@ def register_routes(app):
             }), 400
         
         try:
-            from security import Permission, access_control_policy
-            
             # Create permission object
             permission = Permission(
                 ResourceType(resource_type),
@@ -271,7 +271,8 @@ def require_object_permission(resource_type: ResourceType, resource_id: Union[st
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Check authentication first
-            if not hasattr(g, 'current_user'):
+            user_claims = g.get('current_user')
+            if user_claims is None:
                 return jsonify({
                     "code": "401",
                     "status": "auth_error",
@@ -296,11 +297,11 @@ def require_object_permission(resource_type: ResourceType, resource_id: Union[st
             permission = Permission(resource_type, actual_resource_id, access_level)
             
             # Check permission
-            if not access_control_policy.check_permission(g.current_user, permission):
+            if not access_control_policy.check_permission(user_claims, permission):
                 logger.warning(
                     "Object-level access denied",
                     extra={
-                        "user_sub": g.current_user.get('sub'),
+                        "user_sub": user_claims.get('sub'),
                         "resource_type": resource_type.value,
                         "resource_id": actual_resource_id,
                         "access_level": access_level.value,
@@ -340,14 +341,14 @@ def require_functional_access(function_name: str, required_roles: Optional[List[
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Check authentication first
-            if not hasattr(g, 'current_user'):
+            user_claims = g.get('current_user')
+            if user_claims is None:
                 return jsonify({
                     "code": "401",
                     "status": "auth_error",
                     "error_message": "Authentication required"
                 }), 401
             
-            user_claims = g.current_user
             user_roles = user_claims.get('roles', [])
             
             # Check if user has required roles
@@ -29,6 +29,9 @@ class WellsAuthenticatorProtocol(Protocol):
 class DependencyContainer:
     """Dependency injection container."""
     
+    # Fixed attribute set; lookups on every request skip the instance __dict__
+    __slots__ = ("_authenticator", "_config", "_event_loop")
+    
     def __init__(self):
         self._authenticator: Optional[WellsAuthenticatorProtocol] = None
         self._config = None
@@ -44,6 +47,11 @@ class DependencyContainer:
             raise RuntimeError("Authenticator not configured. Call set_authenticator() first.")
         return self._authenticator
     
+    def invalidate_token(self, token: str) -> bool:
+        """Evict a token from the authenticator's verification cache, if it has one."""
+        invalidate = getattr(self._authenticator, 'invalidate_token', None)
+        return bool(invalidate and invalidate(token))
+    
     def set_config(self, config):
         """Set the configuration instance."""
         self._config = config
@@ -59,11 +67,14 @@ class DependencyContainer:
         if self._event_loop is None or self._event_loop.is_closed():
             try:
                 # Try to get the current event loop
-                self._event_loop = asyncio.get_event_loop()
+                loop = asyncio.get_event_loop()
             except RuntimeError:
-                # Create a new event loop if none exists
-                self._event_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self._event_loop)
+                loop = None
+            if loop is None or loop.is_closed():
+                # Create a new event loop if none exists, or the current one was closed
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+            self._event_loop = loop
         return self._event_loop
 
 
@@ -103,17 +114,18 @@ async def authenticate_wells_token(token: str) -> Tuple[Optional[Dict[str, Any]]
             logger.warning("Wells Fargo Apigee authentication failed", extra={"error": error})
             return None, error
         
-        # Log successful authentication
-        logger.info(
-            "User authenticated successfully via Wells Fargo AuthX Apigee",
-            extra={
-                "sub": claims.get('sub'),
-                "client_id": claims.get('client_id'),
-                "iss": claims.get('iss'),
-                "aud": claims.get('aud'),
-                "scope": claims.get('scope', [])
-            }
-        )
+        # Log successful authentication; skip building the extras when INFO is filtered
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "User authenticated successfully via Wells Fargo AuthX Apigee",
+                extra={
+                    "sub": claims.get('sub'),
+                    "client_id": claims.get('client_id'),
+                    "iss": claims.get('iss'),
+                    "aud": claims.get('aud'),
+                    "scope": claims.get('scope', [])
+                }
+            )
         
         return claims, None
         
@@ -172,8 +184,10 @@ def get_wells_authenticated_user(f):
                     "error_message": error
                 }), 401
             
-            # Store claims in Flask's g object for use in route
+            # Store claims in Flask's g object for use in route; scopes are
+            # split once here so every scope guard on the request reuses them
             g.current_user = claims
+            g.current_user_scopes = frozenset(_extract_scopes(claims))
             g.auth_provider = "apigee"
             
             return f(*args, **kwargs)
@@ -207,16 +221,19 @@ def get_wells_apigee_user(f):
     return get_wells_authenticated_user(f)
 
 
+# Scope claim normalizers by claim type; str.split() drops empty entries itself
+_SCOPE_EXTRACTORS = {
+    list: lambda scope: scope,
+    tuple: list,
+    str: str.split,
+}
+
+
 def _extract_scopes(claims: dict) -> list:
     """Extract scopes from JWT claims."""
-    scope = claims.get('scope', [])
-    if isinstance(scope, str):
-        # Handle space-separated scopes
-        return [s.strip() for s in scope.split() if s.strip()]
-    elif isinstance(scope, list):
-        return scope
-    else:
-        return []
+    scope = claims.get('scope')
+    extract = _SCOPE_EXTRACTORS.get(type(scope))
+    return extract(scope) if extract else []
 
 
 def require_wells_scope(required_scope: str):
@@ -240,23 +257,26 @@ def require_wells_scope(required_scope: str):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # First check authentication
-            if not hasattr(g, 'current_user'):
+            user_claims = g.get('current_user')
+            if user_claims is None:
                 return jsonify({
                     "code": "401",
                     "status": "auth_error",
                     "error_message": "Authentication required"
                 }), 401
             
-            # Extract scopes from claims
-            user_scopes = _extract_scopes(g.current_user)
+            # Scopes split by get_wells_authenticated_user
+            user_scopes = getattr(g, 'current_user_scopes', None)
+            if user_scopes is None:
+                user_scopes = frozenset(_extract_scopes(user_claims))
             
             if required_scope not in user_scopes:
                 logger.warning(
                     "Insufficient scope for Wells Fargo Apigee user",
                     extra={
                         "required_scope": required_scope,
-                        "user_scopes": user_scopes,
-                        "sub": g.current_user.get('sub')
+                        "user_scopes": sorted(user_scopes),
+                        "sub": user_claims.get('sub')
                     }
                 )
                 return jsonify({
@@ -273,20 +293,23 @@ def require_wells_scope(required_scope: str):
 
 def get_wells_client_id() -> str:
     """Get client ID from Wells Fargo Apigee authenticated user."""
-    if not hasattr(g, 'current_user'):
+    claims = g.get('current_user')
+    if claims is None:
         return 'unknown'
-    return g.current_user.get('client_id') or g.current_user.get('sub', 'unknown')
+    return claims.get('client_id') or claims.get('sub', 'unknown')
 
 
 def get_wells_user_id() -> str:
     """Get user ID from Wells Fargo Apigee authenticated user."""
-    if not hasattr(g, 'current_user'):
+    claims = g.get('current_user')
+    if claims is None:
         return 'unknown'
-    return g.current_user.get('sub', 'unknown')
+    return claims.get('sub', 'unknown')
 
 
 def get_wells_user_scopes() -> list:
     """Get user scopes from Wells Fargo Apigee authenticated user."""
-    if not hasattr(g, 'current_user'):
+    claims = g.get('current_user')
+    if claims is None:
         return []
-    return _extract_scopes(g.current_user)
+    return _extract_scopes(claims)
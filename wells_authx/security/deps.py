@@ -7,7 +7,7 @@ from typing import Optional, Dict, Any, Tuple
 
 from flask import request, jsonify, g
 
-from wells_authenticator import wells_authenticator
+from .container import container
 
 logger = logging.getLogger(__name__)
 
@@ -35,26 +35,27 @@ async def authenticate_wells_token(token: str) -> Tuple[Optional[Dict[str, Any]]
         Tuple of (claims_dict, error_message)
     """
     try:
-        await wells_authenticator._initialize_authenticator()
+        authenticator = container.get_authenticator()
         
         # Authenticate using Wells Fargo AuthX Apigee
-        claims, error = await wells_authenticator.authenticate_token(token)
+        claims, error = await authenticator.authenticate_token(token)
         
         if error:
             logger.warning("Wells Fargo Apigee authentication failed", extra={"error": error})
             return None, error
         
-        # Log successful authentication
-        logger.info(
-            "User authenticated successfully via Wells Fargo AuthX Apigee",
-            extra={
-                "sub": claims.get('sub'),
-                "client_id": claims.get('client_id'),
-                "iss": claims.get('iss'),
-                "aud": claims.get('aud'),
-                "scope": claims.get('scope', [])
-            }
-        )
+        # Log successful authentication; skip building the extras when INFO is filtered
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "User authenticated successfully via Wells Fargo AuthX Apigee",
+                extra={
+                    "sub": claims.get('sub'),
+                    "client_id": claims.get('client_id'),
+                    "iss": claims.get('iss'),
+                    "aud": claims.get('aud'),
+                    "scope": claims.get('scope', [])
+                }
+            )
         
         return claims, None
         
@@ -104,8 +105,10 @@ def get_wells_authenticated_user(f):
                     "error_message": error
                 }), 401
             
-            # Store claims in Flask's g object for use in route
+            # Store claims in Flask's g object for use in route; scopes are
+            # split once here so every scope guard on the request reuses them
             g.current_user = claims
+            g.current_user_scopes = frozenset(_extract_scopes(claims))
             g.auth_provider = "apigee"
             
             return f(*args, **kwargs)
@@ -139,16 +142,19 @@ def get_wells_apigee_user(f):
     return get_wells_authenticated_user(f)
 
 
+# Scope claim normalizers by claim type; str.split() drops empty entries itself
+_SCOPE_EXTRACTORS = {
+    list: lambda scope: scope,
+    tuple: list,
+    str: str.split,
+}
+
+
 def _extract_scopes(claims: dict) -> list:
     """Extract scopes from JWT claims."""
-    scope = claims.get('scope', [])
-    if isinstance(scope, str):
-        # Handle space-separated scopes
-        return [s.strip() for s in scope.split() if s.strip()]
-    elif isinstance(scope, list):
-        return scope
-    else:
-        return []
+    scope = claims.get('scope')
+    extract = _SCOPE_EXTRACTORS.get(type(scope))
+    return extract(scope) if extract else []
 
 
 def require_wells_scope(required_scope: str):
@@ -172,23 +178,26 @@ def require_wells_scope(required_scope: str):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # First check authentication
-            if not hasattr(g, 'current_user'):
+            user_claims = g.get('current_user')
+            if user_claims is None:
                 return jsonify({
                     "code": "401",
                     "status": "auth_error",
                     "error_message": "Authentication required"
                 }), 401
             
-            # Extract scopes from claims
-            user_scopes = _extract_scopes(g.current_user)
+            # Scopes split by get_wells_authenticated_user
+            user_scopes = getattr(g, 'current_user_scopes', None)
+            if user_scopes is None:
+                user_scopes = frozenset(_extract_scopes(user_claims))
             
             if required_scope not in user_scopes:
                 logger.warning(
                     "Insufficient scope for Wells Fargo Apigee user",
                     extra={
                         "required_scope": required_scope,
-                        "user_scopes": user_scopes,
-                        "sub": g.current_user.get('sub')
+                        "user_scopes": sorted(user_scopes),
+                        "sub": user_claims.get('sub')
                     }
                 )
                 return jsonify({
@@ -205,20 +214,23 @@ def require_wells_scope(required_scope: str):
 
 def get_wells_client_id() -> str:
     """Get client ID from Wells Fargo Apigee authenticated user."""
-    if not hasattr(g, 'current_user'):
+    claims = g.get('current_user')
+    if claims is None:
         return 'unknown'
-    return g.current_user.get('client_id') or g.current_user.get('sub', 'unknown')
+    return claims.get('client_id') or claims.get('sub', 'unknown')
 
 
 def get_wells_user_id() -> str:
     """Get user ID from Wells Fargo Apigee authenticated user."""
-    if not hasattr(g, 'current_user'):
+    claims = g.get('current_user')
+    if claims is None:
         return 'unknown'
-    return g.current_user.get('sub', 'unknown')
+    return claims.get('sub', 'unknown')
 
 
 def get_wells_user_scopes() -> list:
     """Get user scopes from Wells Fargo Apigee authenticated user."""
-    if not hasattr(g, 'current_user'):
+    claims = g.get('current_user')
+    if claims is None:
         return []
-    return _extract_scopes(g.current_user)
\ No newline at end of file
+    return _extract_scopes(claims)
\ No newline at end of file
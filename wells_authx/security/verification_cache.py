@@ -0,0 +1,104 @@
+"""Short-lived cache of verified Apigee tokens."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _has_sha_extensions() -> bool:
+    """Check whether the CPU advertises SHA-256 instructions (Linux only)."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith(('flags', 'Features')):
+                    flags = line.split(':', 1)[1].split()
+                    return 'sha_ni' in flags or 'sha2' in flags
+    except OSError:
+        pass
+    return False
+
+
+def _sha256(data: bytes) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def _blake2b(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=32).digest()
+
+
+# OpenSSL's SHA-256 uses the CPU's SHA extensions when present; without them
+# BLAKE2b is the cheaper 256-bit digest for multi-KB tokens.
+_digest: Callable[[bytes], bytes] = _sha256 if _has_sha_extensions() else _blake2b
+
+
+class ValidTokenCache:
+    """
+    Bounded LRU of recently verified tokens.
+    
+    Entries are keyed by a 256-bit digest of the token (plus the client ID it
+    was checked for), never the raw token, and expire after the TTL or at the
+    token's own exp, whichever comes first. A lock guards the map because
+    Flask serves requests from multiple threads.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[bytes, str], Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(token: str, client_id: str) -> Tuple[bytes, str]:
+        return _digest(token.encode()), client_id
+    
+    def get(self, token: str, client_id: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return cached claims for a token, or None if absent or expired."""
+        key = self._key(token, client_id)
+        now = time.time() if now is None else now
+        
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            claims, expires_at = cached
+            if now >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+    
+    def put(self, token: str, client_id: str, claims: Dict[str, Any], now: Optional[float] = None) -> None:
+        """Remember claims for a freshly verified token."""
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        exp = claims.get('exp')
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        if expires_at <= now:
+            return
+        
+        key = self._key(token, client_id)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, token: str) -> int:
+        """Drop a token for every client ID it was cached under (e.g. on logout)."""
+        digest = _digest(token.encode())
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == digest]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+    
+    def clear(self) -> None:
+        """Drop all cached tokens."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
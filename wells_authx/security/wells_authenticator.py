@@ -2,9 +2,11 @@
 
 import asyncio
 import logging
+import threading
 from typing import Dict, Any, Optional, Tuple
 
-from ..config import WellsAuthConfig
+from ..config import WellsAuthConfig, get_wells_auth_config
+from .verification_cache import ValidTokenCache
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +18,30 @@ class WellsAuthenticator:
         """Initialize Wells Fargo authenticator for Apigee."""
         self._apigee_authenticator = None
         self._initialized = False
-        self._config = config or WellsAuthConfig()
+        # Threading lock: Flask threads each run their own event loop, and
+        # the guarded section below never awaits
+        self._init_lock = threading.Lock()
+        self._config = config or get_wells_auth_config()
+        self._verified: Optional[ValidTokenCache] = None
+        if self._config.verification_cache_enabled:
+            self._verified = ValidTokenCache(
+                maxsize=self._config.verification_cache_size,
+                ttl=self._config.verification_cache_ttl_sec
+            )
     
     async def _initialize_authenticator(self) -> None:
         """Initialize PyAuthenticator instance for Apigee."""
         if self._initialized:
             return
         
+        with self._init_lock:
+            # Another request may have finished initializing while we waited
+            if self._initialized:
+                return
+            self._create_authenticator()
+    
+    def _create_authenticator(self) -> None:
+        """Build the PyAuthenticator; called once under the init lock."""
         try:
             # Import PyAuthenticator (this will be available when wellsfargo_ebssh_python_auth is installed)
             from ebssh_python_auth.authenticate import PyAuthenticator
@@ -70,25 +89,37 @@ class WellsAuthenticator:
         Returns:
             Tuple of (claims_dict, error_message)
         """
+        effective_client_id = client_id or self._config.apigee_client_id
+        
+        # Recently verified tokens skip the RSA check entirely
+        if self._verified is not None:
+            cached_claims = self._verified.get(token, effective_client_id)
+            if cached_claims is not None:
+                return cached_claims, None
+        
         try:
             await self._initialize_authenticator()
             
             # Prepare request object
-            request_obj = self._create_request_object(client_id)
+            request_obj = self._create_request_object(effective_client_id)
             
-            # Authenticate token using Apigee
+            # Authenticate token using Apigee; called inline since each Flask
+            # request runs on its own short-lived loop with nothing to overlap
             result = self._apigee_authenticator.authenticate(token=token, request=request_obj)
             
             if result and hasattr(result, 'claims'):
                 claims = result.claims
-                logger.info(
-                    "Token authenticated successfully via Apigee",
-                    extra={
-                        "sub": claims.get('sub'),
-                        "client_id": claims.get('client_id'),
-                        "iss": claims.get('iss')
-                    }
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        "Token authenticated successfully via Apigee",
+                        extra={
+                            "sub": claims.get('sub'),
+                            "client_id": claims.get('client_id'),
+                            "iss": claims.get('iss')
+                        }
+                    )
+                if self._verified is not None:
+                    self._verified.put(token, effective_client_id, claims)
                 return claims, None
             else:
                 error_msg = "Authentication failed: Invalid token or claims"
@@ -100,6 +131,17 @@ class WellsAuthenticator:
             logger.error("Token authentication error via Apigee", extra={"error": str(e)})
             return None, error_msg
     
+    def invalidate_token(self, token: str) -> bool:
+        """
+        Evict a token from the verification cache, e.g. on logout.
+        
+        Returns:
+            True if a cached verification was dropped
+        """
+        if self._verified is None:
+            return False
+        return self._verified.invalidate(token) > 0
+    
     def _create_request_object(self, client_id: Optional[str] = None):
         """Create request object for PyAuthenticator."""
         # Use provided client_id or default from config
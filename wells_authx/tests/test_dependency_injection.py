@@ -2,10 +2,12 @@
 
 import pytest
 import asyncio
-from unittest.mock import Mock, AsyncMock, patch
+import sys
+import threading
+from unittest.mock import Mock, patch
 from typing import Dict, Any, Optional, Tuple
 
-from ..security import DependencyContainer, WellsAuthenticatorProtocol, WellsAuthenticator
+from ..security import DependencyContainer, WellsAuthenticator
 from ..config import WellsAuthConfig
 
 
@@ -74,13 +76,13 @@ class TestDependencyInjection:
     def test_container_set_config(self):
         """Test setting config in container."""
         container = DependencyContainer()
-        config = WellsAuthConfig(environment="test")
+        config = WellsAuthConfig(environment="dev")
         
         container.set_config(config)
         retrieved_config = container.get_config()
         
         assert retrieved_config is config
-        assert retrieved_config.environment == "test"
+        assert retrieved_config.environment == "dev"
     
     def test_container_event_loop_management(self):
         """Test event loop management in container."""
@@ -106,7 +108,7 @@ class TestWellsAuthenticator:
     
     def test_authenticator_initialization(self):
         """Test authenticator initialization with config."""
-        config = WellsAuthConfig(environment="test")
+        config = WellsAuthConfig(environment="dev")
         authenticator = WellsAuthenticator(config)
         
         assert authenticator._config is config
@@ -122,38 +124,57 @@ class TestWellsAuthenticator:
     @pytest.mark.asyncio
     async def test_authenticator_initialization_success(self):
         """Test successful authenticator initialization."""
-        config = WellsAuthConfig(environment="test")
+        config = WellsAuthConfig(environment="dev")
         authenticator = WellsAuthenticator(config)
         
-        with patch('wells_authenticator.PyAuthenticator') as mock_py_auth:
-            mock_instance = Mock()
-            mock_py_auth.return_value = mock_instance
-            
+        py_auth_module = Mock()
+        
+        with patch.dict(sys.modules, {"ebssh_python_auth.authenticate": py_auth_module}):
             await authenticator._initialize_authenticator()
-            
-            assert authenticator._initialized is True
-            assert authenticator._apigee_authenticator is mock_instance
-            mock_py_auth.assert_called_once()
+        
+        assert authenticator._initialized is True
+        assert authenticator._apigee_authenticator is py_auth_module.PyAuthenticator.return_value
+        py_auth_module.PyAuthenticator.assert_called_once()
     
     @pytest.mark.asyncio
     async def test_authenticator_initialization_import_error(self):
         """Test authenticator initialization with import error."""
-        config = WellsAuthConfig(environment="test")
+        config = WellsAuthConfig(environment="dev")
         authenticator = WellsAuthenticator(config)
         
-        with patch('wells_authenticator.PyAuthenticator', side_effect=ImportError("Module not found")):
+        # A None entry makes the import raise ImportError
+        with patch.dict(sys.modules, {"ebssh_python_auth.authenticate": None}):
             with pytest.raises(RuntimeError, match="PyAuthenticator not available"):
                 await authenticator._initialize_authenticator()
     
+    def test_authenticator_initialized_once_across_threads(self):
+        """Test concurrent cold requests build a single PyAuthenticator."""
+        config = WellsAuthConfig(environment="dev")
+        authenticator = WellsAuthenticator(config)
+        py_auth_module = Mock()
+        
+        def initialize():
+            asyncio.run(authenticator._initialize_authenticator())
+        
+        with patch.dict(sys.modules, {"ebssh_python_auth.authenticate": py_auth_module}):
+            threads = [threading.Thread(target=initialize) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        assert authenticator._initialized is True
+        py_auth_module.PyAuthenticator.assert_called_once()
+    
     def test_authenticator_get_provider_info(self):
         """Test getting provider info."""
-        config = WellsAuthConfig(environment="test")
+        config = WellsAuthConfig(environment="dev")
         authenticator = WellsAuthenticator(config)
         
         info = authenticator.get_provider_info()
         
         assert info["provider"] == "apigee"
-        assert info["environment"] == "test"
+        assert info["environment"] == "dev"
         assert info["initialized"] is False
 
 
@@ -166,7 +187,7 @@ class TestIntegration:
         container = DependencyContainer()
         
         # Create and configure dependencies
-        config = WellsAuthConfig(environment="test")
+        config = WellsAuthConfig(environment="dev")
         authenticator = WellsAuthenticator(config)
         
         # Set dependencies in container
@@ -182,7 +203,7 @@ class TestIntegration:
         
         # Test provider info
         provider_info = retrieved_authenticator.get_provider_info()
-        assert provider_info["environment"] == "test"
+        assert provider_info["environment"] == "dev"
         assert provider_info["provider"] == "apigee"
 
 
@@ -195,7 +216,7 @@ if __name__ == "__main__":
     print("✓ Container initialization works")
     
     # Test authenticator
-    config = WellsAuthConfig(environment="test")
+    config = WellsAuthConfig(environment="dev")
     authenticator = WellsAuthenticator(config)
     print("✓ Authenticator initialization works")
     
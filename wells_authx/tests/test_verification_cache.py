@@ -0,0 +1,108 @@
+"""Tests for the verified-token cache."""
+
+import pytest
+from unittest.mock import Mock
+
+from ..config import WellsAuthConfig
+from ..security.container import DependencyContainer
+from ..security.verification_cache import ValidTokenCache, _digest
+from ..security.wells_authenticator import WellsAuthenticator
+
+
+class TestValidTokenCache:
+    """Test cache expiry, eviction and keying."""
+    
+    def test_hit_within_ttl(self):
+        """Test claims are served until the TTL elapses."""
+        cache = ValidTokenCache(ttl=5)
+        cache.put("token", "EBSSH", {"sub": "user", "exp": 1000}, now=0)
+        
+        assert cache.get("token", "EBSSH", now=4) == {"sub": "user", "exp": 1000}
+        assert cache.get("token", "EBSSH", now=5) is None
+    
+    def test_expiry_capped_by_exp(self):
+        """Test a token is never served past its own exp."""
+        cache = ValidTokenCache(ttl=5)
+        cache.put("token", "EBSSH", {"sub": "user", "exp": 2}, now=0)
+        cache.put("expired", "EBSSH", {"sub": "user", "exp": 0}, now=0)
+        
+        assert cache.get("token", "EBSSH", now=1) is not None
+        assert cache.get("token", "EBSSH", now=2) is None
+        assert len(cache) == 0
+    
+    def test_keyed_by_digest_and_client(self):
+        """Test the raw token is not stored and client IDs don't share entries."""
+        cache = ValidTokenCache()
+        cache.put("secret-token", "EBSSH", {"sub": "user"}, now=0)
+        
+        assert cache.get("secret-token", "OTHER", now=0) is None
+        assert list(cache._entries) == [(_digest(b"secret-token"), "EBSSH")]
+    
+    def test_evicts_least_recent(self):
+        """Test the cache stays bounded."""
+        cache = ValidTokenCache(maxsize=2)
+        cache.put("a", "EBSSH", {"sub": "a"}, now=0)
+        cache.put("b", "EBSSH", {"sub": "b"}, now=0)
+        cache.get("a", "EBSSH", now=0)
+        cache.put("c", "EBSSH", {"sub": "c"}, now=0)
+        
+        assert cache.get("b", "EBSSH", now=0) is None
+        assert cache.get("a", "EBSSH", now=0) is not None
+
+    def test_invalidate_drops_every_client_entry(self):
+        """Test invalidation removes the token whichever client ID cached it."""
+        cache = ValidTokenCache()
+        cache.put("token", "EBSSH", {"sub": "user"}, now=0)
+        cache.put("token", "OTHER", {"sub": "user"}, now=0)
+        cache.put("kept", "EBSSH", {"sub": "user"}, now=0)
+        
+        assert cache.invalidate("token") == 2
+        assert cache.get("token", "EBSSH", now=0) is None
+        assert cache.get("kept", "EBSSH", now=0) is not None
+
+
+class TestAuthenticatorVerificationCache:
+    """Test the authenticator only verifies a token once while cached."""
+    
+    @pytest.mark.asyncio
+    async def test_cached_token_skips_authenticate(self):
+        """Test a repeat token is answered without calling PyAuthenticator."""
+        authenticator = WellsAuthenticator(WellsAuthConfig(verification_cache_enabled=True))
+        authenticator._initialized = True
+        authenticator._apigee_authenticator = Mock()
+        authenticator._apigee_authenticator.authenticate.return_value = Mock(claims={"sub": "user"})
+        
+        first = await authenticator.authenticate_token("token")
+        second = await authenticator.authenticate_token("token")
+        
+        assert first == second == ({"sub": "user"}, None)
+        assert authenticator._apigee_authenticator.authenticate.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_cache_disabled_by_default(self):
+        """Test every call verifies when the cache is not enabled."""
+        authenticator = WellsAuthenticator(WellsAuthConfig())
+        authenticator._initialized = True
+        authenticator._apigee_authenticator = Mock()
+        authenticator._apigee_authenticator.authenticate.return_value = Mock(claims={"sub": "user"})
+        
+        await authenticator.authenticate_token("token")
+        await authenticator.authenticate_token("token")
+        
+        assert authenticator._apigee_authenticator.authenticate.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_invalidated_token_is_verified_again(self):
+        """Test a token evicted on logout goes back through PyAuthenticator."""
+        authenticator = WellsAuthenticator(WellsAuthConfig(verification_cache_enabled=True))
+        authenticator._initialized = True
+        authenticator._apigee_authenticator = Mock()
+        authenticator._apigee_authenticator.authenticate.return_value = Mock(claims={"sub": "user"})
+        container = DependencyContainer()
+        container.set_authenticator(authenticator)
+        
+        await authenticator.authenticate_token("token")
+        assert container.invalidate_token("token") is True
+        await authenticator.authenticate_token("token")
+        
+        assert authenticator._apigee_authenticator.authenticate.call_count == 2